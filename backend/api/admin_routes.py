@@ -372,7 +372,7 @@ async def get_system_status():
 async def scheduler_status():
     """获取调度器运行状态"""
     from ..main import scheduler as _scheduler
-    from ..utils.tasks import _background_tasks
+    from ..utils.tasks import get_tracked_tasks_count
     from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING, STATE_STOPPED
     state_map = {STATE_STOPPED: "stopped", STATE_RUNNING: "running", STATE_PAUSED: "paused"}
     paused_jobs = []
@@ -389,7 +389,7 @@ async def scheduler_status():
         "total_jobs": len(_scheduler.get_jobs()),
         "active_jobs": active_jobs,
         "paused_jobs": paused_jobs,
-        "background_tasks": len(_background_tasks),
+        "background_tasks": get_tracked_tasks_count(),
     }
 
 
@@ -423,14 +423,13 @@ async def cancel_all_background_tasks(body: Optional[CancelAllRequest] = None):
     """取消所有运行中的后台采集任务。需要 confirm=true 确认。"""
     if not (body and body.confirm):
         raise HTTPException(status_code=400, detail="此操作将取消所有后台任务，请传入 confirm=true 确认")
-    from ..utils.tasks import _background_tasks
-    # 1) 取消 asyncio 后台任务
+    from ..utils.tasks import tracked_tasks
+    # 1) 取消 asyncio 后台任务（任务结束时由 done 回调自行移出跟踪链表）
     cancelled_count = 0
-    for task in list(_background_tasks):
+    for task in tracked_tasks():
         if not task.done():
             task.cancel()
             cancelled_count += 1
-    _background_tasks.clear()
 
     # 2) 标记 sync_task_logs 中运行中的任务为 FAILED
     sync_updated = 0
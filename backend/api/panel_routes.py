@@ -133,7 +133,7 @@ async def panel_run_task(task_id: str):
     from ..utils.tasks import _track_task
     if task_id not in PANEL_TASKS:
         raise HTTPException(status_code=404, detail=f"unknown task_id: {task_id}")
-    run_fn = PANEL_TASKS[task_id]["run"]
+    run_fn = PANEL_TASKS[task_id].run
     _track_task(run_fn())
     return {"message": "task started", "task_id": task_id}
 
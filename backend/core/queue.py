@@ -5,9 +5,10 @@ Used for historical full crawls; worker consumes pending subtasks periodically.
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from pymongo import ReturnDocument
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 
 from ..infra.database import mongo_db
 from .domain import VALID_ACTIONS
@@ -34,6 +35,80 @@ DEFAULT_ACTIONS = ["high", "hot", "chance", "industryViewV2", "industryTrendRang
 DEFAULT_GRANULARITIES = ["day", "month", "quarter", "year"]
 
 
+def _period_keys_by_gran(granules: Sequence[str], start_date: str, end_date: str) -> Dict[str, List[str]]:
+    keys_by_gran: Dict[str, List[str]] = {}
+    for gran in granules:
+        try:
+            keys_by_gran[gran] = period_keys_in_range(gran, start_date, end_date)
+        except Exception:
+            continue
+    return keys_by_gran
+
+
+def build_job_doc(
+    start_date: str,
+    end_date: str,
+    granularities: Optional[List[str]] = None,
+    actions: Optional[List[str]] = None,
+    cat_id: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Build a PENDING crawl_job document with a pre-assigned _id (not inserted)."""
+    granules = granularities or DEFAULT_GRANULARITIES
+    acts = actions or DEFAULT_ACTIONS
+    acts = [a for a in acts if a in VALID_ACTIONS]
+    now = now or datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "type": "mengla_full_crawl",
+        "status": JOB_PENDING,
+        "config": {
+            "start_date": start_date,
+            "end_date": end_date,
+            "granularities": granules,
+            "actions": acts,
+            "catId": (cat_id or "").strip(),
+            "extra": extra or {},
+        },
+        "stats": {"total_subtasks": 0, "completed": 0, "failed": 0},
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def build_subtask_docs(
+    job_doc: Dict[str, Any],
+    keys_by_gran: Optional[Dict[str, List[str]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build the PENDING subtask documents for a job built by build_job_doc and
+    fill in its stats.total_subtasks. keys_by_gran lets callers creating many
+    jobs over the same range compute the period keys only once.
+    """
+    config = job_doc["config"]
+    if keys_by_gran is None:
+        keys_by_gran = _period_keys_by_gran(config["granularities"], config["start_date"], config["end_date"])
+    now = job_doc["created_at"]
+    docs = [
+        {
+            "job_id": job_doc["_id"],
+            "action": action,
+            "granularity": gran,
+            "period_key": period_key,
+            "status": SUB_PENDING,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for action in config["actions"]
+        for gran in config["granularities"]
+        for period_key in keys_by_gran.get(gran, ())
+    ]
+    job_doc["stats"]["total_subtasks"] = len(docs)
+    return docs
+
+
 async def create_crawl_job(
     start_date: str,
     end_date: str,
@@ -49,56 +124,44 @@ async def create_crawl_job(
     if mongo_db is None:
         return None
 
-    granules = granularities or DEFAULT_GRANULARITIES
-    acts = actions or DEFAULT_ACTIONS
-    acts = [a for a in acts if a in VALID_ACTIONS]
-    config = {
-        "start_date": start_date,
-        "end_date": end_date,
-        "granularities": granules,
-        "actions": acts,
-        "catId": (cat_id or "").strip(),
-        "extra": extra or {},
-    }
+    job_doc = build_job_doc(start_date, end_date, granularities, actions, cat_id, extra)
+    sub_docs = build_subtask_docs(job_doc)
+    await mongo_db[CRAWL_JOBS].insert_one(job_doc)
+    if sub_docs:
+        await mongo_db[CRAWL_SUBTASKS].insert_many(sub_docs, ordered=False)
+    return job_doc["_id"]
+
+
+async def create_crawl_jobs(
+    start_date: str,
+    end_date: str,
+    cat_ids: Sequence[str],
+    granularities: Optional[List[str]] = None,
+    actions: Optional[List[str]] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> List[Any]:
+    """
+    Create one crawl_job per cat_id with two insert_many calls (jobs, then all
+    subtasks) instead of one create_crawl_job round-trip sequence per category.
+    Returns the job _ids in cat_ids order, or [] if mongo_db is not available.
+    """
+    if mongo_db is None or not cat_ids:
+        return []
 
     now = datetime.utcnow()
-    job_doc = {
-        "type": "mengla_full_crawl",
-        "status": JOB_PENDING,
-        "config": config,
-        "stats": {"total_subtasks": 0, "completed": 0, "failed": 0},
-        "created_at": now,
-        "updated_at": now,
-    }
-    result = await mongo_db[CRAWL_JOBS].insert_one(job_doc)
-    job_id = result.inserted_id
-
-    total = 0
-    for action in acts:
-        for gran in granules:
-            try:
-                keys = period_keys_in_range(gran, start_date, end_date)
-            except Exception:
-                continue
-            for period_key in keys:
-                sub_doc = {
-                    "job_id": job_id,
-                    "action": action,
-                    "granularity": gran,
-                    "period_key": period_key,
-                    "status": SUB_PENDING,
-                    "attempts": 0,
-                    "created_at": now,
-                    "updated_at": now,
-                }
-                await mongo_db[CRAWL_SUBTASKS].insert_one(sub_doc)
-                total += 1
+    job_docs = [
+        build_job_doc(start_date, end_date, granularities, actions, cat_id, extra, now=now)
+        for cat_id in cat_ids
+    ]
+    keys_by_gran = _period_keys_by_gran(job_docs[0]["config"]["granularities"], start_date, end_date)
+    sub_docs: List[Dict[str, Any]] = []
+    for job_doc in job_docs:
+        sub_docs.extend(build_subtask_docs(job_doc, keys_by_gran))
 
-    await mongo_db[CRAWL_JOBS].update_one(
-        {"_id": job_id},
-        {"$set": {"stats.total_subtasks": total, "updated_at": datetime.utcnow()}},
-    )
-    return job_id
+    await mongo_db[CRAWL_JOBS].insert_many(job_docs, ordered=False)
+    if sub_docs:
+        await mongo_db[CRAWL_SUBTASKS].insert_many(sub_docs, ordered=False)
+    return [job_doc["_id"] for job_doc in job_docs]
 
 
 async def get_next_job() -> Optional[Dict[str, Any]]:
@@ -125,16 +188,62 @@ async def get_next_job() -> Optional[Dict[str, Any]]:
     return job
 
 
-async def get_pending_subtasks(job_id: Any, limit: int = 1) -> List[Dict[str, Any]]:
-    """Return up to `limit` PENDING subtasks for the job, oldest first."""
+async def get_pending_subtasks(
+    job_id: Any, limit: int = 1, max_attempts: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Return up to `limit` PENDING subtasks for the job, oldest first.
+    With max_attempts, subtasks that already used up their retries are left
+    out (see expire_exhausted_subtasks).
+    """
     if mongo_db is None:
         return []
-    cursor = mongo_db[CRAWL_SUBTASKS].find(
-        {"job_id": job_id, "status": SUB_PENDING},
-    ).sort("created_at", 1)
+    query: Dict[str, Any] = {"job_id": job_id, "status": SUB_PENDING}
+    if max_attempts is not None:
+        query["attempts"] = {"$lt": max_attempts}
+    cursor = mongo_db[CRAWL_SUBTASKS].find(query).sort("created_at", 1)
     return await cursor.to_list(length=limit)
 
 
+async def expire_exhausted_subtasks(max_attempts: int, job_id: Any = None) -> int:
+    """
+    用一次 update_many 把重试次数已用尽（attempts >= max_attempts）的 PENDING subtask
+    标记为 FAILED，并按 job 汇总后一次 bulk_write 累加 stats.failed。
+    job_id 为空时处理全部 job。返回处理的 subtask 数。
+    """
+    if mongo_db is None:
+        return 0
+    coll = mongo_db[CRAWL_SUBTASKS]
+    query: Dict[str, Any] = {"status": SUB_PENDING, "attempts": {"$gte": max_attempts}}
+    if job_id is not None:
+        query["job_id"] = job_id
+    groups = await coll.aggregate(
+        [{"$match": query}, {"$group": {"_id": "$job_id", "n": {"$sum": 1}}}]
+    ).to_list(length=None)
+    if not groups:
+        return 0
+    now = datetime.utcnow()
+    await coll.update_many(
+        query,
+        {
+            "$set": {
+                "status": SUB_FAILED,
+                "finished_at": now,
+                "last_error": f"超过最大重试次数 {max_attempts}",
+                "updated_at": now,
+            }
+        },
+    )
+    await mongo_db[CRAWL_JOBS].bulk_write(
+        [
+            UpdateOne({"_id": g["_id"]}, {"$inc": {"stats.failed": g["n"]}, "$set": {"updated_at": now}})
+            for g in groups
+        ],
+        ordered=False,
+    )
+    return sum(g["n"] for g in groups)
+
+
 async def claim_next_subtask(job_id: Any, worker_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     原子 claim：使用 find_one_and_update 将一个 PENDING subtask
@@ -160,20 +269,52 @@ async def claim_next_subtask(job_id: Any, worker_id: Optional[str] = None) -> Op
 
 
 async def claim_subtasks(
-    job_id: Any, limit: int = 1, worker_id: Optional[str] = None
+    job_id: Any,
+    limit: int = 1,
+    worker_id: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+    ids: Optional[Sequence[Any]] = None,
 ) -> List[Dict[str, Any]]:
     """
     批量原子 claim 多个 subtask。
-    每次调用 find_one_and_update 原子地领取一条，循环至 limit 或无可领取。
+    先查出至多 limit 个 PENDING subtask 的 _id，再用一次 update_many（带 status=PENDING 条件）
+    标记为 RUNNING 并写入本次 claim_token，最后按 claim_token 取回实际领取成功的文档。
+    并发消费者竞争同一批 _id 时，只有状态仍为 PENDING 的文档会被本次领取。
+    若整批都被其他消费者抢走（update 命中 0 条），重新查询剩余 PENDING 再领取，
+    只有确实没有 PENDING 时才返回空列表，调用方可以据此判断"无任务"。
     通过 worker_id 标记领取者，防止高并发下的混淆。
+    可选 max_attempts 跳过已用尽重试次数的 subtask；可选 ids 只在给定 _id 中领取
+    （job_id 为 None 时不限定 job）。
     """
-    claimed = []
-    for _ in range(limit):
-        doc = await claim_next_subtask(job_id, worker_id=worker_id)
-        if doc is None:
+    if mongo_db is None:
+        return []
+    coll = mongo_db[CRAWL_SUBTASKS]
+    query: Dict[str, Any] = {"status": SUB_PENDING}
+    if job_id is not None:
+        query["job_id"] = job_id
+    if ids is not None:
+        query["_id"] = {"$in": list(ids)}
+    if max_attempts is not None:
+        query["attempts"] = {"$lt": max_attempts}
+    while True:
+        cursor = coll.find(query, {"_id": 1}).sort("created_at", 1)
+        candidates = [d["_id"] for d in await cursor.to_list(length=limit)]
+        if not candidates:
+            return []
+        now = datetime.utcnow()
+        claim_token = ObjectId()
+        update: Dict[str, Any] = {
+            "$set": {"status": SUB_RUNNING, "started_at": now, "updated_at": now, "claim_token": claim_token},
+            "$inc": {"attempts": 1},
+        }
+        if worker_id:
+            update["$set"]["claimed_by"] = worker_id
+        result = await coll.update_many({**query, "_id": {"$in": candidates}}, update)
+        # 候选全部被抢走：这些文档已离开 PENDING，重查必然前进，不会死循环
+        if result.modified_count:
             break
-        claimed.append(doc)
-    return claimed
+    cursor = coll.find({"_id": {"$in": candidates}, "claim_token": claim_token}).sort("created_at", 1)
+    return await cursor.to_list(length=len(candidates))
 
 
 async def set_job_running(job_id: Any) -> None:
@@ -225,6 +366,40 @@ async def set_subtask_failed(subtask_id: Any, error_message: str = "") -> None:
     )
 
 
+async def set_subtasks_finished(
+    succeeded_ids: Sequence[Any],
+    failed: Sequence[Tuple[Any, str]] = (),
+) -> None:
+    """批量写回一批 subtask 的执行结果（一次 bulk_write 替代逐条 set_subtask_success/failed）。"""
+    if mongo_db is None:
+        return
+    if not succeeded_ids and not failed:
+        return
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"_id": sid},
+            {"$set": {"status": SUB_SUCCESS, "finished_at": now, "updated_at": now}},
+        )
+        for sid in succeeded_ids
+    ]
+    ops.extend(
+        UpdateOne(
+            {"_id": sid},
+            {
+                "$set": {
+                    "status": SUB_FAILED,
+                    "finished_at": now,
+                    "last_error": error_message[:2000] if error_message else "",
+                    "updated_at": now,
+                }
+            },
+        )
+        for sid, error_message in failed
+    )
+    await mongo_db[CRAWL_SUBTASKS].bulk_write(ops, ordered=False)
+
+
 async def inc_job_stats(job_id: Any, completed_delta: int = 0, failed_delta: int = 0) -> None:
     if mongo_db is None:
         return
@@ -15,7 +15,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Deque
 
-from ..utils.config import REDIS_KEY_PREFIX
+from ..utils.config import REDIS_PREFIX_STATS
 from . import database
 
 
@@ -297,7 +297,7 @@ class MetricsCollector:
         
         async with self._lock:
             date_key = datetime.utcnow().strftime("%Y-%m-%d")
-            redis_key = f"{REDIS_KEY_PREFIX['stats']}:{date_key}"
+            redis_key = f"{REDIS_PREFIX_STATS}:{date_key}"
             
             metrics_dict = self._metrics.to_dict()
             
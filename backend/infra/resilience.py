@@ -58,17 +58,35 @@ def is_retryable_exception(exc: Exception) -> bool:
     return False
 
 
+def _with_jitter(delay: float) -> float:
+    # 添加 ±25% 的随机抖动
+    jitter_range = delay * 0.25
+    return max(0, delay + random.uniform(-jitter_range, jitter_range))
+
+
 def calculate_delay(attempt: int, base_delay: float, max_delay: float, jitter: bool = True) -> float:
     """计算退避延迟时间（指数退避 + 可选抖动）"""
     exponential_base = RETRY_CONFIG.get("exponential_base", 2)
     delay = min(base_delay * (exponential_base ** attempt), max_delay)
-    
-    if jitter:
-        # 添加 ±25% 的随机抖动
-        jitter_range = delay * 0.25
-        delay = delay + random.uniform(-jitter_range, jitter_range)
-    
-    return max(0, delay)
+    return _with_jitter(delay) if jitter else max(0, delay)
+
+
+# 按默认配置预先算好的封顶指数退避表（第 i 次重试 = min(base * exp^i, max)）
+_RETRY_DELAYS: Tuple[float, ...] = tuple(
+    min(
+        RETRY_CONFIG["base_delay"] * (RETRY_CONFIG.get("exponential_base", 2) ** i),
+        RETRY_CONFIG["max_delay"],
+    )
+    for i in range(RETRY_CONFIG["max_attempts"])
+)
+
+
+def retry_delay(attempt: int, jitter: bool = True) -> float:
+    """按默认 RETRY_CONFIG 计算退避延迟：查表代替每次 pow/min，超出表长时回退到 calculate_delay"""
+    if attempt >= len(_RETRY_DELAYS):
+        return calculate_delay(attempt, RETRY_CONFIG["base_delay"], RETRY_CONFIG["max_delay"], jitter)
+    delay = _RETRY_DELAYS[attempt]
+    return _with_jitter(delay) if jitter else max(0, delay)
 
 
 async def retry_async(
@@ -102,6 +120,11 @@ async def retry_async(
     _base_delay = base_delay or RETRY_CONFIG["base_delay"]
     _max_delay = max_delay or RETRY_CONFIG["max_delay"]
     _jitter = jitter if jitter is not None else RETRY_CONFIG.get("jitter", True)
+    # 循环外一次性选定延迟函数：默认配置走预计算表，自定义参数走 calculate_delay
+    if _base_delay == RETRY_CONFIG["base_delay"] and _max_delay == RETRY_CONFIG["max_delay"]:
+        delay_fn = retry_delay
+    else:
+        delay_fn = functools.partial(calculate_delay, base_delay=_base_delay, max_delay=_max_delay)
     
     last_exception: Optional[Exception] = None
     
@@ -119,7 +142,7 @@ async def retry_async(
                 raise
             
             if attempt < _max_attempts - 1:
-                delay = calculate_delay(attempt, _base_delay, _max_delay, _jitter)
+                delay = delay_fn(attempt, jitter=_jitter)
                 logger.warning(
                     "Retry attempt %d/%d after %.2fs: %s",
                     attempt + 1, _max_attempts, delay, e
@@ -9,7 +9,6 @@ MengLa Data Collector — FastAPI 入口
 - 管理生命周期事件（startup / shutdown）
 - 后台任务跟踪
 """
-import asyncio
 import logging
 import os
 from pathlib import Path
@@ -117,7 +116,7 @@ scheduler = init_scheduler()
 # ---------------------------------------------------------------------------
 # 后台任务跟踪（从 utils.tasks 导入，避免循环依赖）
 # ---------------------------------------------------------------------------
-from .utils.tasks import _track_task, _background_tasks, _bg_lock  # noqa: E402
+from .utils.tasks import _track_task, cancel_all_tracked_tasks, tracked_tasks  # noqa: E402
 
 
 # ---------------------------------------------------------------------------
@@ -157,12 +156,9 @@ async def _shutdown() -> None:
         logger.warning("Scheduler shutdown error: %s", exc)
 
     # 2. 取消所有跟踪的后台任务
-    async with _bg_lock:
-        tasks_snapshot = list(_background_tasks)
-    if tasks_snapshot:
-        logger.info("Cancelling %d background tasks", len(tasks_snapshot))
-        for task in tasks_snapshot:
-            task.cancel()
-        done, pending = await asyncio.wait(tasks_snapshot, timeout=5.0)
+    cancelled = await cancel_all_tracked_tasks(timeout=5.0)
+    if cancelled:
+        logger.info("Cancelled %d background tasks", cancelled)
+        pending = len(tracked_tasks())
         if pending:
-            logger.warning("%d background tasks did not finish in time", len(pending))
+            logger.warning("%d background tasks did not finish in time", pending)
@@ -7,27 +7,37 @@ MengLa 定时任务调度器
 - run_mengla_granular_jobs(): 全量多颗粒度补齐
 """
 import asyncio
+import itertools
 import logging
 import random
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from .infra import database
-from .utils.period import make_period_keys, period_to_date_range
+from .utils.period import TREND_DATE_TYPES, make_period_keys, period_to_date_range
 from .core.domain import query_mengla
 from .core.queue import (
     get_next_job,
     claim_subtasks,
-    set_job_running,
-    set_subtask_success,
-    set_subtask_failed,
+    set_subtasks_finished,
     inc_job_stats,
     finish_job_if_done,
 )
-from .utils.category import get_top_level_cat_ids
-from .utils.config import SCHEDULER_CONFIG, CRON_JOBS, CONCURRENT_CONFIG, get_collect_interval, parse_cron_expr
+from .utils.category import get_top_level_cat_ids, reload_categories_if_changed
+from .utils.config import (
+    SCHEDULER_CONFIG,
+    CRON_JOBS,
+    CRON_PARSED,
+    CONCURRENT_CONFIG,
+    build_redis_data_key,
+    get_collect_interval,
+    parse_cron_expr,
+)
 from .infra.resilience import retry_async, RetryError
 from .core.sync_task_log import (
     create_sync_task_log,
@@ -45,17 +55,50 @@ from .core.sync_task_log import (
 
 logger = logging.getLogger("mengla-scheduler")
 
+# init_scheduler 创建的调度器实例（供队列消费者动态调整自身间隔）
+_scheduler: Optional[AsyncIOScheduler] = None
+
+# 队列消费者空轮询退避：连续空轮询时间隔翻倍（240 → 480 → 960s ...，上限 30 分钟），
+# 取到任务后恢复基础间隔，降低空闲时的 Mongo 查询量
+_CRAWL_QUEUE_JOB_ID = "crawl_queue"
+_CRAWL_QUEUE_BASE_INTERVAL = 240
+_CRAWL_QUEUE_MAX_INTERVAL = 1800
+_crawl_queue_interval = _CRAWL_QUEUE_BASE_INTERVAL
+
+
+# 一级类目缓存：由独立的定时任务每 10 分钟刷新，采集任务直接读取，避免在热路径上做 I/O
+_CAT_CACHE: Dict[str, Any] = {"ids": [""], "ts": 0}
 
-def _get_top_cat_ids_safe() -> List[str]:
-    """Try to load all top-level catIds; fallback to [''] if unavailable."""
+
+def _load_top_cat_ids() -> Tuple[str, ...]:
+    """Pick up category.json changes, then return the (memoized) top-level catIds."""
+    reload_categories_if_changed()
+    return get_top_level_cat_ids()
+
+
+async def _refresh_cat_ids() -> None:
+    """Reload top-level catIds in a worker thread and update _CAT_CACHE."""
     try:
-        cat_ids = get_top_level_cat_ids()
-        if cat_ids:
-            return cat_ids
-        logger.warning("category_utils returned empty top-level cat list, falling back to default catId=''")
+        ids = list(await asyncio.to_thread(_load_top_cat_ids))
     except Exception as exc:  # noqa: BLE001
         logger.warning("failed to load top-level categories: %s", exc)
-    return [""]
+        return
+    if ids:
+        _CAT_CACHE["ids"] = ids
+        _CAT_CACHE["ts"] = time.time()
+    else:
+        logger.warning("category_utils returned empty top-level cat list, keeping cached catIds")
+
+
+async def _get_top_cat_ids_safe() -> List[str]:
+    """
+    Return cached top-level catIds.
+    Cache miss (refresh job has not succeeded yet) loads them via asyncio.to_thread;
+    falls back to [''] if still unavailable.
+    """
+    if not _CAT_CACHE["ts"]:
+        await _refresh_cat_ids()
+    return _CAT_CACHE["ids"]
 
 
 def init_scheduler() -> AsyncIOScheduler:
@@ -63,7 +106,9 @@ def init_scheduler() -> AsyncIOScheduler:
     初始化 APScheduler，注册 MengLa 相关定时任务。
     使用统一的 run_period_collect 替代 4 个独立采集函数。
     """
+    global _scheduler
     scheduler = AsyncIOScheduler(timezone=SCHEDULER_CONFIG["timezone"])
+    _scheduler = scheduler
 
     # 从 CRON_JOBS 配置注册定时采集任务（支持环境变量覆盖 cron 表达式）
     _cron_job_defs = [
@@ -76,7 +121,7 @@ def init_scheduler() -> AsyncIOScheduler:
 
     for job_id, func, args, name in _cron_job_defs:
         cron_expr = CRON_JOBS[job_id]["cron"]
-        cron_params = parse_cron_expr(cron_expr)
+        cron_params = CRON_PARSED.get(job_id) or parse_cron_expr(cron_expr)
         scheduler.add_job(
             func,
             "cron",
@@ -91,12 +136,22 @@ def init_scheduler() -> AsyncIOScheduler:
     scheduler.add_job(
         run_crawl_queue_once,
         "interval",
-        seconds=240,  # 4 min
+        seconds=_CRAWL_QUEUE_BASE_INTERVAL,  # 4 min，空轮询时自动退避
         jitter=60,    # +/-1 min jitter => ~3-5 min
-        id="crawl_queue",
+        id=_CRAWL_QUEUE_JOB_ID,
         name="Queue Consumer",
     )
 
+    # 一级类目缓存刷新：启动时立即执行一次，之后每 10 分钟刷新
+    scheduler.add_job(
+        _refresh_cat_ids,
+        "interval",
+        seconds=600,
+        next_run_time=datetime.now(scheduler.timezone),
+        id="refresh_cat_ids",
+        name="Category Refresh",
+    )
+
     logger.info("Scheduler initialized with %d jobs", len(scheduler.get_jobs()))
     return scheduler
 
@@ -113,6 +168,8 @@ MENG_LA_ACTIONS: Dict[str, List[str]] = {
 NON_TREND_ACTIONS = ["high", "hot", "chance", "industryViewV2"]
 # 趋势接口
 TREND_ACTION = "industryTrendRange"
+# 采集颗粒度
+_GRANULARITIES = ("day", "month", "quarter", "year")
 
 
 # ==============================================================================
@@ -126,6 +183,27 @@ _GRANULARITY_TASK_NAMES: Dict[str, str] = {
 }
 
 
+async def _probe_redis_cached(
+    specs: Iterable[Tuple[str, str, str, str]],
+) -> Set[Tuple[str, str, str, str]]:
+    """
+    用一次 Redis pipeline 批量 EXISTS 探测 (cat_id, action, granularity, period_key)
+    是否已有缓存，返回已命中的集合。Redis 不可用或探测失败时返回空集合（全部照常采集）。
+    """
+    specs = list(specs)
+    if database.redis_client is None or not specs:
+        return set()
+    try:
+        pipe = database.redis_client.pipeline(transaction=False)
+        for cat_id, action, gran, period_key in specs:
+            pipe.exists(build_redis_data_key(action, cat_id or "", gran, period_key))
+        hits = await pipe.execute()
+    except Exception as e:
+        logger.warning("Redis cache probe failed, collect all: %s", e)
+        return set()
+    return {spec for spec, hit in zip(specs, hits) if hit}
+
+
 async def run_period_collect(
     granularity: str,
     target_date: Optional[datetime] = None,
@@ -139,7 +217,7 @@ async def run_period_collect(
     # 计算目标日期
     target = target_date or _compute_target_date(granularity)
     periods = make_period_keys(target)
-    top_cat_ids = _get_top_cat_ids_safe()
+    top_cat_ids = await _get_top_cat_ids_safe()
 
     stats = {"total": 0, "success": 0, "failed": 0}
     period_key = periods[granularity]
@@ -182,10 +260,27 @@ async def run_period_collect(
     max_parallel = CONCURRENT_CONFIG.get("max_concurrent", 5)
 
     try:
+        # 0) Redis 已有缓存的组合直接计为成功，不再逐个走 query_mengla
+        cached = await _probe_redis_cached(
+            (cat_id, action, granularity, period_key)
+            for cat_id, action in itertools.product(top_cat_ids, NON_TREND_ACTIONS)
+        )
+        if cached:
+            stats["total"] += len(cached)
+            stats["success"] += len(cached)
+            await update_sync_task_progress(log_id, completed_delta=len(cached))
+            logger.info("%s collect: %d tasks already cached, skipped", granularity.capitalize(), len(cached))
+
         # 1) 非趋势接口 —— 同一 cat_id 的不同 action 并行
         for cat_id in top_cat_ids:
             if is_cancelled(log_id):
                 break
+            actions = [
+                action for action in NON_TREND_ACTIONS
+                if (cat_id, action, granularity, period_key) not in cached
+            ]
+            if not actions:
+                continue
 
             sem = asyncio.Semaphore(max_parallel)
 
@@ -199,7 +294,7 @@ async def run_period_collect(
                         granularity=granularity,
                     )
 
-            tasks_batch = [_do_collect(action, cat_id) for action in NON_TREND_ACTIONS]
+            tasks_batch = [_do_collect(action, cat_id) for action in actions]
             stats["total"] += len(tasks_batch)
             results = await asyncio.gather(*tasks_batch, return_exceptions=True)
 
@@ -228,8 +323,7 @@ async def run_period_collect(
         today_str = datetime.now().strftime("%Y-%m-%d")
         if end_year > today_str:
             end_year = today_str
-        date_type_map = {"day": "DAY", "month": "MONTH", "quarter": "QUARTERLY_FOR_YEAR", "year": "YEAR"}
-        trend_date_type = date_type_map.get(granularity, "DAY")
+        trend_date_type = TREND_DATE_TYPES.get(granularity, "DAY")
 
         for cat_id in top_cat_ids:
             if is_cancelled(log_id):
@@ -359,7 +453,7 @@ async def run_backfill_check(
         return {"status": "skipped", "reason": "db_not_connected"}
 
     now = datetime.now()
-    top_cat_ids = _get_top_cat_ids_safe()
+    top_cat_ids = await _get_top_cat_ids_safe()
     interval = get_collect_interval()
 
     # 补数检查应检查上一个完整周期，而非当天（当天数据尚未产生）
@@ -394,51 +488,46 @@ async def run_backfill_check(
         for granularity in ["day", "month"]:
             period_key = check_targets[granularity][granularity]
 
-            for cat_id in top_cat_ids:
+            for cat_id, action in itertools.product(top_cat_ids, NON_TREND_ACTIONS):
                 if is_cancelled(log_id):
                     break
-                for action in NON_TREND_ACTIONS:
-                    if is_cancelled(log_id):
-                        break
-                    stats["checked"] += 1
-
-                    query = {
-                        "action": action,
-                        "cat_id": cat_id or "",
-                        "granularity": granularity,
-                        "period_key": period_key,
-                    }
-
-                    try:
-                        doc = await collection.find_one(query)
-                        need_backfill = False
-                        if doc is None:
-                            need_backfill = True
-                            stats["missing"] += 1
-                        elif doc.get("is_empty", False):
-                            # 之前采集过但数据为空，重新尝试
-                            need_backfill = True
-                            stats["missing"] += 1
-
-                        if need_backfill:
-                            success = await _collect_with_retry(
-                                action=action,
-                                cat_id=cat_id,
-                                date_type=granularity,
-                                timest=period_key,
-                                granularity=granularity,
-                            )
-                            if success:
-                                stats["backfilled"] += 1
-                            else:
-                                stats["failed"] += 1
-                            await asyncio.sleep(random.uniform(interval * 0.25, interval * 0.75))
-                    except Exception as e:
-                        logger.warning("Backfill check error: %s", e)
+                stats["checked"] += 1
+
+                query = {
+                    "action": action,
+                    "cat_id": cat_id or "",
+                    "granularity": granularity,
+                    "period_key": period_key,
+                }
+
+                try:
+                    doc = await collection.find_one(query)
+                    need_backfill = False
+                    if doc is None:
+                        need_backfill = True
+                        stats["missing"] += 1
+                    elif doc.get("is_empty", False):
+                        # 之前采集过但数据为空，重新尝试
+                        need_backfill = True
+                        stats["missing"] += 1
+
+                    if need_backfill:
+                        success = await _collect_with_retry(
+                            action=action,
+                            cat_id=cat_id,
+                            date_type=granularity,
+                            timest=period_key,
+                            granularity=granularity,
+                        )
+                        if success:
+                            stats["backfilled"] += 1
+                        else:
+                            stats["failed"] += 1
+                        await asyncio.sleep(random.uniform(interval * 0.25, interval * 0.75))
+                except Exception as e:
+                    logger.warning("Backfill check error: %s", e)
 
-                    await update_sync_task_progress(log_id, completed_delta=1)
-                if is_cancelled(log_id):
-                    break
+                await update_sync_task_progress(log_id, completed_delta=1)
             if is_cancelled(log_id):
                 break
 
@@ -479,12 +568,17 @@ async def run_mengla_jobs(
     else:
         periods = {
             gran: make_period_keys(_compute_target_date(gran))[gran]
-            for gran in ("day", "month", "quarter", "year")
+            for gran in _GRANULARITIES
         }
-    top_cat_ids = _get_top_cat_ids_safe()
+    top_cat_ids = await _get_top_cat_ids_safe()
+    specs = [
+        (cat_id, action, gran)
+        for cat_id, (action, granularities) in itertools.product(top_cat_ids, MENG_LA_ACTIONS.items())
+        for gran in granularities
+    ]
 
     # 总任务数: cats * 5 actions * 4 granularities
-    total_tasks = len(top_cat_ids) * sum(len(g) for g in MENG_LA_ACTIONS.values())
+    total_tasks = len(specs)
 
     log_id = await create_sync_task_log(
         task_id="mengla_single_day",
@@ -497,33 +591,27 @@ async def run_mengla_jobs(
     failed = 0
 
     try:
-        for cat_id in top_cat_ids:
+        for cat_id, action, gran in specs:
             if is_cancelled(log_id):
                 break
-            for action, granularities in MENG_LA_ACTIONS.items():
-                if is_cancelled(log_id):
-                    break
-                for gran in granularities:
-                    if is_cancelled(log_id):
-                        break
-                    period_key = periods[gran]
-                    try:
-                        await query_mengla(
-                            action=action,
-                            product_id="",
-                            catId=cat_id,
-                            dateType=gran,
-                            timest=period_key,
-                            starRange="",
-                            endRange="",
-                            extra=None,
-                        )
-                        completed += 1
-                        await update_sync_task_progress(log_id, completed_delta=1)
-                    except Exception as e:
-                        failed += 1
-                        await update_sync_task_progress(log_id, failed_delta=1)
-                        logger.warning("MengLa single day error: action=%s cat=%s gran=%s err=%s", action, cat_id, gran, e)
+            period_key = periods[gran]
+            try:
+                await query_mengla(
+                    action=action,
+                    product_id="",
+                    catId=cat_id,
+                    dateType=gran,
+                    timest=period_key,
+                    starRange="",
+                    endRange="",
+                    extra=None,
+                )
+                completed += 1
+                await update_sync_task_progress(log_id, completed_delta=1)
+            except Exception as e:
+                failed += 1
+                await update_sync_task_progress(log_id, failed_delta=1)
+                logger.warning("MengLa single day error: action=%s cat=%s gran=%s err=%s", action, cat_id, gran, e)
 
         if is_cancelled(log_id):
             _unmark_cancelled(log_id)
@@ -558,16 +646,16 @@ async def run_mengla_granular_jobs(
     else:
         periods = {
             gran: make_period_keys(_compute_target_date(gran))[gran]
-            for gran in ("day", "month", "quarter", "year")
+            for gran in _GRANULARITIES
         }
         # 趋势接口用 day 颗粒度的目标日期确定年份
         now = _compute_target_date("day")
-    top_cat_ids = _get_top_cat_ids_safe()
+    top_cat_ids = await _get_top_cat_ids_safe()
     interval = get_collect_interval()
 
-    non_trend_count = len(top_cat_ids) * 4 * 4
-    trend_count = len(top_cat_ids) * 4
-    total_tasks = non_trend_count + trend_count
+    non_trend_specs = list(itertools.product(top_cat_ids, NON_TREND_ACTIONS, _GRANULARITIES))
+    trend_specs = list(itertools.product(top_cat_ids, _GRANULARITIES))
+    total_tasks = len(non_trend_specs) + len(trend_specs)
 
     task_id = "mengla_granular_force" if force_refresh else "mengla_granular"
     task_name = "MengLa 强制全量采集" if force_refresh else "MengLa 日/月/季/年补齐"
@@ -634,43 +722,45 @@ async def run_mengla_granular_jobs(
 
     cancelled = False
     try:
-        for cat_id in top_cat_ids:
+        # 非强制模式下，Redis 已有缓存的组合直接计为完成
+        if not force_refresh:
+            cached = await _probe_redis_cached(
+                (cat_id, action, gran, periods[gran]) for cat_id, action, gran in non_trend_specs
+            )
+            if cached:
+                non_trend_specs = [
+                    spec for spec in non_trend_specs
+                    if (spec[0], spec[1], spec[2], periods[spec[2]]) not in cached
+                ]
+                completed_count += len(cached)
+                await update_sync_task_progress(log_id, completed_delta=len(cached))
+                logger.info("Granular jobs: %d tasks already cached, skipped", len(cached))
+
+        for cat_id, action, gran in non_trend_specs:
             if is_cancelled(log_id):
                 cancelled = True
                 break
-            for action in ["high", "hot", "chance", "industryViewV2"]:
-                if is_cancelled(log_id):
-                    cancelled = True
-                    break
-                for gran in ["day", "month", "quarter", "year"]:
-                    if is_cancelled(log_id):
-                        cancelled = True
-                        break
-                    period_key = periods[gran]
-                    success = await query_with_retry(
-                        action=action,
-                        product_id="",
-                        catId=cat_id,
-                        dateType=gran,
-                        timest=period_key,
-                        starRange="",
-                        endRange="",
-                        extra=None,
-                        use_cache=not force_refresh,
-                    )
+            period_key = periods[gran]
+            success = await query_with_retry(
+                action=action,
+                product_id="",
+                catId=cat_id,
+                dateType=gran,
+                timest=period_key,
+                starRange="",
+                endRange="",
+                extra=None,
+                use_cache=not force_refresh,
+            )
 
-                    if success:
-                        completed_count += 1
-                        await update_sync_task_progress(log_id, completed_delta=1)
-                    else:
-                        failed_count += 1
-                        await update_sync_task_progress(log_id, failed_delta=1)
+            if success:
+                completed_count += 1
+                await update_sync_task_progress(log_id, completed_delta=1)
+            else:
+                failed_count += 1
+                await update_sync_task_progress(log_id, failed_delta=1)
 
-                    await asyncio.sleep(random.uniform(interval * 1.5, interval * 4.5))
-                if cancelled:
-                    break
-            if cancelled:
-                break
+            await asyncio.sleep(random.uniform(interval * 1.5, interval * 4.5))
 
         if not cancelled:
             year_str = str(now.year)
@@ -679,36 +769,30 @@ async def run_mengla_granular_jobs(
             if end_year > today_str:
                 end_year = today_str
 
-            for cat_id in top_cat_ids:
+            for cat_id, gran in trend_specs:
                 if is_cancelled(log_id):
                     cancelled = True
                     break
-                for gran in ["day", "month", "quarter", "year"]:
-                    if is_cancelled(log_id):
-                        cancelled = True
-                        break
-                    success = await query_with_retry(
-                        action="industryTrendRange",
-                        product_id="",
-                        catId=cat_id,
-                        dateType=gran.upper(),
-                        timest="",
-                        starRange=start_year,
-                        endRange=end_year,
-                        extra=None,
-                        use_cache=not force_refresh,
-                    )
+                success = await query_with_retry(
+                    action=TREND_ACTION,
+                    product_id="",
+                    catId=cat_id,
+                    dateType=gran.upper(),
+                    timest="",
+                    starRange=start_year,
+                    endRange=end_year,
+                    extra=None,
+                    use_cache=not force_refresh,
+                )
 
-                    if success:
-                        completed_count += 1
-                        await update_sync_task_progress(log_id, completed_delta=1)
-                    else:
-                        failed_count += 1
-                        await update_sync_task_progress(log_id, failed_delta=1)
+                if success:
+                    completed_count += 1
+                    await update_sync_task_progress(log_id, completed_delta=1)
+                else:
+                    failed_count += 1
+                    await update_sync_task_progress(log_id, failed_delta=1)
 
-                    await asyncio.sleep(random.uniform(interval * 1.5, interval * 4.5))
-                if cancelled:
-                    break
+                await asyncio.sleep(random.uniform(interval * 1.5, interval * 4.5))
 
         if cancelled:
             logger.info(
@@ -747,6 +831,55 @@ async def run_mengla_granular_jobs_force() -> None:
 # ==============================================================================
 # 队列消费者（使用原子 claim）
 # ==============================================================================
+def _set_crawl_queue_interval(seconds: int) -> None:
+    """调整队列消费者的轮询间隔（仅在间隔变化时 reschedule）。"""
+    global _crawl_queue_interval
+    if seconds == _crawl_queue_interval:
+        return
+    _crawl_queue_interval = seconds
+    if _scheduler is None:
+        return
+    try:
+        _scheduler.reschedule_job(_CRAWL_QUEUE_JOB_ID, trigger="interval", seconds=seconds, jitter=60)
+        logger.info("Queue consumer interval set to %ds", seconds)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("failed to reschedule queue consumer: %s", exc)
+
+
+async def _run_crawl_subtask(sub: Dict[str, Any], cat_id: str, extra: Dict[str, Any]) -> Optional[str]:
+    """执行单个队列子任务，成功返回 None，失败返回错误信息。"""
+    action = sub.get("action", "")
+    gran = sub.get("granularity", "day")
+    period_key = sub.get("period_key", "")
+    try:
+        if action == "industryTrendRange":
+            start_range, end_range = period_to_date_range(gran, period_key)
+            await query_mengla(
+                action=action,
+                product_id="",
+                catId=cat_id,
+                dateType=gran.upper(),
+                timest="",
+                starRange=start_range,
+                endRange=end_range,
+                extra=extra,
+            )
+        else:
+            await query_mengla(
+                action=action,
+                product_id="",
+                catId=cat_id,
+                dateType=gran,
+                timest=period_key,
+                starRange="",
+                endRange="",
+                extra=extra,
+            )
+        return None
+    except Exception as exc:  # noqa: BLE001
+        return str(exc)
+
+
 async def run_crawl_queue_once(max_batch: int = 1) -> None:
     """
     Queue consumer: pick one RUNNING/PENDING crawl job, run up to max_batch
@@ -757,7 +890,10 @@ async def run_crawl_queue_once(max_batch: int = 1) -> None:
         return
     job = await get_next_job()
     if not job:
+        # 空轮询：拉长下一次轮询间隔
+        _set_crawl_queue_interval(min(_crawl_queue_interval * 2, _CRAWL_QUEUE_MAX_INTERVAL))
         return
+    _set_crawl_queue_interval(_CRAWL_QUEUE_BASE_INTERVAL)
     job_id = job["_id"]
     # get_next_job 已原子认领 PENDING->RUNNING，无需再调用 set_job_running
     config = job.get("config") or {}
@@ -766,40 +902,14 @@ async def run_crawl_queue_once(max_batch: int = 1) -> None:
 
     # 原子 claim subtasks（替代原来的 get_pending_subtasks + set_subtask_running 两步操作）
     subtasks = await claim_subtasks(job_id, limit=max_batch)
-    for sub in subtasks:
-        sub_id = sub["_id"]
-        action = sub.get("action", "")
-        gran = sub.get("granularity", "day")
-        period_key = sub.get("period_key", "")
-        try:
-            if action == "industryTrendRange":
-                start_range, end_range = period_to_date_range(gran, period_key)
-                await query_mengla(
-                    action=action,
-                    product_id="",
-                    catId=cat_id,
-                    dateType=gran.upper(),
-                    timest="",
-                    starRange=start_range,
-                    endRange=end_range,
-                    extra=extra,
-                )
-            else:
-                await query_mengla(
-                    action=action,
-                    product_id="",
-                    catId=cat_id,
-                    dateType=gran,
-                    timest=period_key,
-                    starRange="",
-                    endRange="",
-                    extra=extra,
-                )
-            await set_subtask_success(sub_id)
-            await inc_job_stats(job_id, completed_delta=1, failed_delta=0)
-        except Exception as exc:  # noqa: BLE001
-            await set_subtask_failed(sub_id, str(exc))
-            await inc_job_stats(job_id, completed_delta=0, failed_delta=1)
+    if subtasks:
+        errors = await asyncio.gather(
+            *(_run_crawl_subtask(sub, cat_id, extra) for sub in subtasks)
+        )
+        succeeded_ids = [sub["_id"] for sub, error in zip(subtasks, errors) if error is None]
+        failed_pairs = [(sub["_id"], error) for sub, error in zip(subtasks, errors) if error is not None]
+        await set_subtasks_finished(succeeded_ids, failed_pairs)
+        await inc_job_stats(job_id, completed_delta=len(succeeded_ids), failed_delta=len(failed_pairs))
 
     await finish_job_if_done(job_id)
 
@@ -807,45 +917,53 @@ async def run_crawl_queue_once(max_batch: int = 1) -> None:
 # ==============================================================================
 # 面板任务注册表
 # ==============================================================================
-PANEL_TASKS: Dict[str, dict] = {
-    "mengla_granular": {
-        "name": "MengLa 日/月/季/年补齐",
-        "description": "对 high/hot/chance/industryViewV2/industryTrendRange 按当日颗粒度补齐（有缓存时跳过）",
-        "run": run_mengla_granular_jobs_manual,
-    },
-    "mengla_granular_force": {
-        "name": "MengLa 强制全量采集",
-        "description": "强制刷新所有接口数据（跳过缓存，直接从数据源采集）",
-        "run": run_mengla_granular_jobs_force,
-    },
-    "mengla_single_day": {
-        "name": "MengLa 单日补齐",
-        "description": "同上，仅针对当日 period_key 各接口触发一次",
-        "run": lambda: run_mengla_jobs(trigger=TRIGGER_MANUAL),
-    },
-    "daily_collect": {
-        "name": "每日主采集",
-        "description": "采集前一天的 day 颗粒度数据",
-        "run": lambda: run_period_collect("day", trigger=TRIGGER_MANUAL),
-    },
-    "monthly_collect": {
-        "name": "月度采集",
-        "description": "采集上月的 month 颗粒度数据",
-        "run": lambda: run_period_collect("month", trigger=TRIGGER_MANUAL),
-    },
-    "quarterly_collect": {
-        "name": "季度采集",
-        "description": "采集上季的 quarter 颗粒度数据",
-        "run": lambda: run_period_collect("quarter", trigger=TRIGGER_MANUAL),
-    },
-    "yearly_collect": {
-        "name": "年度采集",
-        "description": "采集上年的 year 颗粒度数据",
-        "run": lambda: run_period_collect("year", trigger=TRIGGER_MANUAL),
-    },
-    "backfill_check": {
-        "name": "补数检查",
-        "description": "检查最近数据是否有缺失，触发补采",
-        "run": lambda: run_backfill_check(trigger=TRIGGER_MANUAL),
-    },
-}
+@dataclass(frozen=True, slots=True)
+class PanelTask:
+    """面板可手动触发的任务"""
+    name: str
+    description: str
+    run: Callable[[], Awaitable[Any]]
+
+
+PANEL_TASKS: Mapping[str, PanelTask] = MappingProxyType({
+    "mengla_granular": PanelTask(
+        name="MengLa 日/月/季/年补齐",
+        description="对 high/hot/chance/industryViewV2/industryTrendRange 按当日颗粒度补齐（有缓存时跳过）",
+        run=run_mengla_granular_jobs_manual,
+    ),
+    "mengla_granular_force": PanelTask(
+        name="MengLa 强制全量采集",
+        description="强制刷新所有接口数据（跳过缓存，直接从数据源采集）",
+        run=run_mengla_granular_jobs_force,
+    ),
+    "mengla_single_day": PanelTask(
+        name="MengLa 单日补齐",
+        description="同上，仅针对当日 period_key 各接口触发一次",
+        run=lambda: run_mengla_jobs(trigger=TRIGGER_MANUAL),
+    ),
+    "daily_collect": PanelTask(
+        name="每日主采集",
+        description="采集前一天的 day 颗粒度数据",
+        run=lambda: run_period_collect("day", trigger=TRIGGER_MANUAL),
+    ),
+    "monthly_collect": PanelTask(
+        name="月度采集",
+        description="采集上月的 month 颗粒度数据",
+        run=lambda: run_period_collect("month", trigger=TRIGGER_MANUAL),
+    ),
+    "quarterly_collect": PanelTask(
+        name="季度采集",
+        description="采集上季的 quarter 颗粒度数据",
+        run=lambda: run_period_collect("quarter", trigger=TRIGGER_MANUAL),
+    ),
+    "yearly_collect": PanelTask(
+        name="年度采集",
+        description="采集上年的 year 颗粒度数据",
+        run=lambda: run_period_collect("year", trigger=TRIGGER_MANUAL),
+    ),
+    "backfill_check": PanelTask(
+        name="补数检查",
+        description="检查最近数据是否有缺失，触发补采",
+        run=lambda: run_backfill_check(trigger=TRIGGER_MANUAL),
+    ),
+})
@@ -19,19 +19,27 @@
 import argparse
 import asyncio
 import json
+import logging
 import os
+import queue
 import random
 import sys
+import time
+from collections import deque
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from bson import ObjectId
+
 from backend.infra import database
 from backend.utils.category import get_top_level_cat_ids
 from backend.core.domain import query_mengla
-from backend.utils.period import period_keys_in_range, period_to_date_range
+from backend.utils.period import TREND_DATE_TYPES, period_keys_in_range, period_to_date_range
+from backend.utils.config import COLLECTION_NAME, REDIS_PREFIX_TASK_QUEUE
 from backend.core.queue import (
     CRAWL_JOBS,
     CRAWL_SUBTASKS,
@@ -44,61 +52,201 @@ from backend.core.queue import (
     SUB_PENDING,
     SUB_RUNNING,
     SUB_SUCCESS,
-    create_crawl_job,
+    claim_subtasks,
+    create_crawl_jobs,
+    expire_exhausted_subtasks,
     finish_job_if_done,
     get_next_job,
-    get_pending_subtasks,
     inc_job_stats,
     set_job_running,
-    set_subtask_failed,
-    set_subtask_running,
-    set_subtask_success,
+    set_subtasks_finished,
 )
 
 
+logger = logging.getLogger("mengla-backfill")
+
+
+def _setup_console_logging(verbose: bool = False):
+    """
+    CLI 输出走 QueueHandler -> 后台线程 QueueListener，
+    采集循环里只做入队，不在事件循环上同步 write() 终端/管道。
+    返回 listener，调用方退出前 stop() 以刷出剩余日志。
+    """
+    from logging.handlers import QueueHandler, QueueListener
+    
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, stream)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+    logger.propagate = False
+    listener.start()
+    return listener
+
+
+class RateLimiter:
+    """
+    上游请求节流：只有真正打到上游的请求才占用间隔。
+    wait() 仅在距上次预占不足 min_interval_s(+随机抖动) 时等待剩余时间。
+    多个协程共享同一实例时，wait() 之后立即 reserve() 预占下一个时间片
+    （两者之间没有 await，不会被其他协程插队），再发起请求；
+    结果命中缓存或请求失败时 release() 归还时间片并唤醒等待者，
+    下一次上游请求也就不必为它们补睡。
+    """
+
+    def __init__(self, min_interval_s: float, jitter_s: float = 0.0):
+        self.min_interval_s = min_interval_s
+        self.jitter_s = max(0.0, jitter_s)
+        self._next_ready = 0.0
+        self._released = asyncio.Event()
+
+    async def wait(self) -> None:
+        # 醒来后重新检查：等待期间可能已有其他协程 mark() 推后了时间片，
+        # 或 release() 归还了时间片（此时提前唤醒，不必睡满）
+        while (delay := self._next_ready - time.monotonic()) > 0:
+            released = self._released
+            try:
+                async with asyncio.timeout(delay):
+                    await released.wait()
+            except TimeoutError:
+                pass
+
+    def mark(self) -> None:
+        self._next_ready = time.monotonic() + self.min_interval_s + random.uniform(0, self.jitter_s)
+
+    def reserve(self) -> tuple[float, float]:
+        """wait() 之后调用：预占下一个时间片，返回 (原时间片, 新时间片) 供 release() 归还"""
+        prev = self._next_ready
+        self.mark()
+        return prev, self._next_ready
+
+    def release(self, slot: tuple[float, float]) -> None:
+        """请求没有打到上游时归还 reserve() 预占的时间片；已被后续请求接着预占时保持不动"""
+        prev, reserved = slot
+        if self._next_ready == reserved:
+            self._next_ready = prev
+            # 唤醒正在 wait() 的协程并换一个新的 Event，供下一轮等待使用
+            self._released.set()
+            self._released = asyncio.Event()
+
+
 # ==============================================================================
 # 进度管理（简单补录用）
 # ==============================================================================
+# 快照（JSON）+ 追加日志（每行一条 JSON）：
+# 完成/失败只追加一行日志，定期把内存状态压缩写回快照并清空日志。
+# 内存/快照中只保留最近 FAILED_KEEP 条失败，完整失败历史另行追加到 FAILED_LOG。
 PROGRESS_FILE = Path(__file__).parent / "backfill_progress.json"
+PROGRESS_JOURNAL = Path(__file__).parent / "backfill_progress.ndjson"
+FAILED_LOG = Path(__file__).parent / "backfill_failed.ndjson"
+PROGRESS_COMPACT_EVERY = 10000
+FAILED_KEEP = 1000
+
+
+def _new_progress():
+    return {"completed": set(), "failed": deque(maxlen=FAILED_KEEP), "last_update": None}
+
+
+def _append_line(path, entry):
+    """追加一行 JSON（每次写完即关闭文件，进程中断最多丢失半行）"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
 
 def load_progress():
-    """加载进度"""
+    """加载进度：读取快照后重放追加日志"""
+    progress = _new_progress()
     if PROGRESS_FILE.exists():
         try:
             with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+                snapshot = json.load(f)
+            progress["completed"] = set(snapshot.get("completed", []))
+            progress["failed"].extend(snapshot.get("failed", []))
+            progress["last_update"] = snapshot.get("last_update")
         except Exception:
             pass
-    return {"completed": [], "failed": [], "last_update": None}
+    if PROGRESS_JOURNAL.exists():
+        with open(PROGRESS_JOURNAL, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # 中断时写了一半的行
+                if entry.get("status") == "completed":
+                    progress["completed"].add(entry["task"])
+                elif entry.get("status") == "failed":
+                    progress["failed"].append({"task": entry["task"], "error": entry.get("error", "")})
+    return progress
 
 
 def save_progress(progress):
-    """保存进度"""
+    """压缩进度：把内存状态整体写回快照，并清空追加日志"""
     progress["last_update"] = datetime.now().isoformat()
-    with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-        json.dump(progress, f, ensure_ascii=False, indent=2)
+    snapshot = dict(
+        progress,
+        completed=sorted(progress["completed"]),
+        failed=list(progress["failed"]),
+    )
+    tmp_file = PROGRESS_FILE.with_suffix(".json.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    tmp_file.replace(PROGRESS_FILE)
+    PROGRESS_JOURNAL.unlink(missing_ok=True)
+
+
+def clear_progress():
+    """删除快照、追加日志与失败历史"""
+    for path in (PROGRESS_FILE, PROGRESS_JOURNAL, FAILED_LOG):
+        path.unlink(missing_ok=True)
 
 
 def is_completed(progress, task_key):
     """检查任务是否已完成"""
-    return task_key in progress.get("completed", [])
+    return task_key in progress["completed"]
 
 
 def mark_completed(progress, task_key):
     """标记任务完成"""
-    if task_key not in progress.get("completed", []):
-        progress["completed"].append(task_key)
+    if task_key not in progress["completed"]:
+        progress["completed"].add(task_key)
+        _append_line(PROGRESS_JOURNAL, {"status": "completed", "task": task_key})
 
 
 def mark_failed(progress, task_key, error):
     """标记任务失败"""
-    progress.setdefault("failed", []).append({"task": task_key, "error": str(error)})
+    entry = {"status": "failed", "task": task_key, "error": str(error)}
+    progress["failed"].append({"task": task_key, "error": str(error)})
+    _append_line(PROGRESS_JOURNAL, entry)
+    _append_line(FAILED_LOG, dict(entry, at=datetime.now().isoformat()))
 
 
 # ==============================================================================
 # 简单补录（串行执行，支持断点续传）
 # ==============================================================================
+@lru_cache(maxsize=16)
+def _cached_keys(gran, start_date, end_date):
+    """同一次运行内 (颗粒度, 起止日期) 的 period_key 只计算一次；返回不可变 tuple 以便安全共享"""
+    return tuple(period_keys_in_range(gran, start_date, end_date))
+
+
+async def _stored_period_keys(cat_id, action, gran, period_keys):
+    """一次 $in 查询取出 mengla_data 中已有非空数据的 period_key"""
+    if database.mongo_db is None or not period_keys:
+        return set()
+    cursor = database.mongo_db[COLLECTION_NAME].find(
+        {
+            "action": action,
+            "cat_id": cat_id or "",
+            "granularity": gran,
+            "period_key": {"$in": list(period_keys)},
+            "is_empty": {"$ne": True},
+        },
+        {"_id": 0, "period_key": 1},
+    )
+    return {doc["period_key"] async for doc in cursor}
+
+
 async def backfill_data(
     start_date: str,
     end_date: str,
@@ -108,6 +256,8 @@ async def backfill_data(
     resume: bool = True,
     sleep_min: float = 1.0,
     sleep_max: float = 3.0,
+    parallel_cats: int = 3,
+    progress_every: int = 100,
 ):
     """
     补录历史数据（API 调用接口）
@@ -121,58 +271,81 @@ async def backfill_data(
         resume: 是否断点续传
         sleep_min: 最小休眠时间（秒）
         sleep_max: 最大休眠时间（秒）
+        parallel_cats: 同时处理的类目数
+        progress_every: 每完成多少个任务输出一次汇总进度
+    
+    所有输出（横幅、进度、统计）都走 logger，与 QueueListener 共用一条队列，保证先后顺序。
     """
-    print("=" * 80)
-    print("历史数据补录")
-    print("=" * 80)
+    logger.info("=" * 80)
+    logger.info("历史数据补录")
+    logger.info("=" * 80)
     
     # 1. 连接数据库
-    print("\n[1/4] 连接数据库...")
+    logger.info("\n[1/4] 连接数据库...")
     mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     mongo_db_name = os.getenv("MONGO_DB", "industry_monitor")
     redis_uri = os.getenv("REDIS_URI", "redis://localhost:6379/0")
     
     await database.connect_to_mongo(mongo_uri, mongo_db_name)
     await database.connect_to_redis(redis_uri)
-    print("✓ 数据库连接成功")
+    logger.info("✓ 数据库连接成功")
     
     # 2. 加载进度
-    progress = load_progress() if resume else {"completed": [], "failed": []}
+    if resume:
+        progress = load_progress()
+    else:
+        progress = _new_progress()
+        clear_progress()
     if resume and progress.get("completed"):
-        print(f"\n✓ 加载进度: 已完成 {len(progress['completed'])} 个任务")
+        logger.info(f"\n✓ 加载进度: 已完成 {len(progress['completed'])} 个任务")
     
     # 3. 计算任务
-    print("\n[2/4] 计算任务...")
-    print(f"  时间范围: {start_date} ~ {end_date}")
-    print(f"  接口: {', '.join(actions)}")
-    print(f"  颗粒度: {', '.join(granularities)}")
-    print(f"  类目数: {len(cat_ids)}")
+    logger.info("\n[2/4] 计算任务...")
+    logger.info(f"  时间范围: {start_date} ~ {end_date}")
+    logger.info(f"  接口: {', '.join(actions)}")
+    logger.info(f"  颗粒度: {', '.join(granularities)}")
+    logger.info(f"  类目数: {len(cat_ids)}（并发 {parallel_cats}）")
     
     # 计算各颗粒度的 period_key
-    period_keys_map = {}
     for gran in granularities:
-        keys = period_keys_in_range(gran, start_date, end_date)
-        period_keys_map[gran] = keys
-        print(f"  {gran}: {len(keys)} 个时间点")
+        logger.info(f"  {gran}: {len(_cached_keys(gran, start_date, end_date))} 个时间点")
     
     # 4. 执行采集
-    print("\n[3/4] 开始采集...")
-    print("=" * 80)
+    logger.info("\n[3/4] 开始采集...")
+    logger.info("=" * 80)
     
-    completed = 0
-    failed = 0
-    skipped = 0
+    counts = {"completed": 0, "failed": 0, "skipped": 0}
+    rate = RateLimiter(sleep_min, sleep_max - sleep_min)
+    sem = asyncio.Semaphore(max(1, parallel_cats))
     
-    try:
-        for cat_id in cat_ids:
-            print(f"\n类目: {cat_id}")
+    progress_every = max(1, progress_every)
+    
+    def _on_completed(task_key):
+        counts["completed"] += 1
+        mark_completed(progress, task_key)
+        if counts["completed"] % PROGRESS_COMPACT_EVERY == 0:
+            save_progress(progress)
+        if counts["completed"] % progress_every == 0:
+            logger.info(
+                "进度: 完成 %d, 失败 %d, 跳过 %d",
+                counts["completed"], counts["failed"], counts["skipped"],
+            )
+    
+    def _on_failed(task_key, error):
+        counts["failed"] += 1
+        mark_failed(progress, task_key, str(error))
+    
+    async def _process_cat(cat_id):
+        """单个类目的全部接口 × 颗粒度；不同类目之间由信号量限制并发"""
+        async with sem:
+            logger.debug("类目: %s", cat_id)
             
             for action in actions:
-                print(f"  接口: {action}")
+                logger.debug("  [%s] 接口: %s", cat_id, action)
                 
                 if action == "industryTrendRange":
                     # 趋势接口：按年范围查询
-                    year_keys = period_keys_map.get("year", [])
+                    year_keys = _cached_keys("year", start_date, end_date) if "year" in granularities else ()
                     for year in year_keys:
                         start_year = f"{year}-01-01"
                         end_year = f"{year}-12-31"
@@ -181,18 +354,18 @@ async def backfill_data(
                             task_key = f"{cat_id}|{action}|{gran}|{year}"
                             
                             if is_completed(progress, task_key):
-                                skipped += 1
+                                counts["skipped"] += 1
                                 continue
                             
-                            date_type = {
-                                "day": "DAY",
-                                "month": "MONTH",
-                                "quarter": "QUARTERLY_FOR_YEAR",
-                                "year": "YEAR",
-                            }.get(gran, "DAY")
+                            date_type = TREND_DATE_TYPES.get(gran, "DAY")
                             
+                            # 先预占时间片再请求，并发类目之间不会同时打到上游；
+                            # 命中缓存或请求失败时归还时间片，只有上游请求占用间隔
+                            await rate.wait()
+                            slot = rate.reserve()
+                            fresh = False
                             try:
-                                await query_mengla(
+                                res = await query_mengla(
                                     action=action,
                                     product_id="",
                                     catId=cat_id,
@@ -202,33 +375,36 @@ async def backfill_data(
                                     endRange=end_year,
                                     extra=None,
                                 )
-                                completed += 1
-                                mark_completed(progress, task_key)
-                                
-                                if completed % 10 == 0:
-                                    save_progress(progress)
-                                    print(f"    进度: 完成 {completed}, 失败 {failed}, 跳过 {skipped}")
-                                
-                                await asyncio.sleep(random.uniform(sleep_min, sleep_max))
+                                # 趋势接口 L3 部分命中时返回三元组，只取来源
+                                fresh = res[1] == "fresh"
+                                _on_completed(task_key)
                             except Exception as e:
-                                failed += 1
-                                mark_failed(progress, task_key, str(e))
-                                print(f"    ✗ 失败: {task_key} - {e}")
+                                _on_failed(task_key, e)
+                                logger.warning("    ✗ 失败: %s - %s", task_key, e)
+                            finally:
+                                if not fresh:
+                                    rate.release(slot)
                 else:
                     # 非趋势接口：按时间点逐个采集
                     for gran in granularities:
-                        period_keys = period_keys_map.get(gran, [])
-                        print(f"    {gran}: {len(period_keys)} 个时间点")
+                        period_keys = _cached_keys(gran, start_date, end_date)
+                        logger.debug("    [%s] %s: %d 个时间点", cat_id, gran, len(period_keys))
+                        stored = await _stored_period_keys(cat_id, action, gran, period_keys)
                         
-                        for i, period_key in enumerate(period_keys):
+                        for period_key in period_keys:
                             task_key = f"{cat_id}|{action}|{gran}|{period_key}"
                             
-                            if is_completed(progress, task_key):
-                                skipped += 1
+                            if period_key in stored or is_completed(progress, task_key):
+                                counts["skipped"] += 1
                                 continue
                             
+                            # 先预占时间片再请求，并发类目之间不会同时打到上游；
+                            # 命中缓存或请求失败时归还时间片，只有上游请求占用间隔
+                            await rate.wait()
+                            slot = rate.reserve()
+                            fresh = False
                             try:
-                                await query_mengla(
+                                res = await query_mengla(
                                     action=action,
                                     product_id="",
                                     catId=cat_id,
@@ -238,54 +414,99 @@ async def backfill_data(
                                     endRange="",
                                     extra=None,
                                 )
-                                completed += 1
-                                mark_completed(progress, task_key)
-                                
-                                if completed % 50 == 0:
-                                    save_progress(progress)
-                                    print(f"      进度: {i + 1}/{len(period_keys)}, 完成 {completed}, 失败 {failed}, 跳过 {skipped}")
-                                
-                                await asyncio.sleep(random.uniform(sleep_min, sleep_max))
+                                # 趋势接口 L3 部分命中时返回三元组，只取来源
+                                fresh = res[1] == "fresh"
+                                _on_completed(task_key)
                             except Exception as e:
-                                failed += 1
-                                mark_failed(progress, task_key, str(e))
+                                _on_failed(task_key, e)
+                                logger.warning("    ✗ 失败: %s - %s", task_key, e)
+                            finally:
+                                if not fresh:
+                                    rate.release(slot)
+    
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for cat_id in cat_ids:
+                tg.create_task(_process_cat(cat_id))
         
-        print("\n✓ 采集完成")
+        logger.info("\n✓ 采集完成")
         
     except KeyboardInterrupt:
-        print("\n\n⚠ 用户中断，保存进度...")
+        logger.warning("\n\n⚠ 用户中断，保存进度...")
         save_progress(progress)
     except Exception as e:
-        print(f"\n\n✗ 采集出错: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n\n✗ 采集出错: {e}")
         save_progress(progress)
     
     # 5. 保存最终进度
     save_progress(progress)
     
     # 6. 关闭连接
-    print("\n[4/4] 关闭连接...")
+    logger.info("\n[4/4] 关闭连接...")
     await database.disconnect_redis()
     await database.disconnect_mongo()
-    print("✓ 已关闭连接")
+    logger.info("✓ 已关闭连接")
     
     # 7. 统计
-    print("\n" + "=" * 80)
-    print("采集统计")
-    print("=" * 80)
-    print(f"  成功: {completed:,}")
-    print(f"  失败: {failed:,}")
-    print(f"  跳过: {skipped:,}")
-    print(f"  总计: {completed + failed + skipped:,}")
-    print(f"  进度文件: {PROGRESS_FILE}")
-    print("=" * 80)
+    logger.info("\n" + "=" * 80)
+    logger.info("采集统计")
+    logger.info("=" * 80)
+    logger.info(f"  成功: {counts['completed']:,}")
+    logger.info(f"  失败: {counts['failed']:,}")
+    logger.info(f"  跳过: {counts['skipped']:,}")
+    logger.info(f"  总计: {sum(counts.values()):,}")
+    logger.info(f"  进度文件: {PROGRESS_FILE}")
+    logger.info("=" * 80)
 
 
 # ==============================================================================
 # 队列补录（多 worker 并发）
 # ==============================================================================
-REQUEST_LOCK = asyncio.Lock()
+# 待处理 subtask _id 的 Redis 列表：create 时 RPUSH，worker BLPOP 阻塞等待，
+# 省去空闲时的固定间隔轮询；Redis 不可用时 worker 退回 MongoDB 轮询
+SUBTASK_QUEUE_KEY = f"{REDIS_PREFIX_TASK_QUEUE}:crawl_subtasks"
+SUBTASK_POP_TIMEOUT = 10
+
+
+async def _enqueue_pending_subtasks(job_ids):
+    """把这些 job 下所有 PENDING subtask 的 _id 推入 Redis 队列，返回推入数量"""
+    if database.redis_client is None or database.mongo_db is None or not job_ids:
+        return 0
+    cursor = database.mongo_db[CRAWL_SUBTASKS].find(
+        {"job_id": {"$in": list(job_ids)}, "status": SUB_PENDING}, {"_id": 1},
+    ).sort("created_at", 1)
+    pushed = 0
+    chunk = []
+    async for doc in cursor:
+        chunk.append(str(doc["_id"]))
+        if len(chunk) >= 1000:
+            await database.redis_client.rpush(SUBTASK_QUEUE_KEY, *chunk)
+            pushed += len(chunk)
+            chunk = []
+    if chunk:
+        await database.redis_client.rpush(SUBTASK_QUEUE_KEY, *chunk)
+        pushed += len(chunk)
+    return pushed
+
+
+async def _pop_subtask_ids(limit):
+    """
+    阻塞弹出至多 limit 个 subtask _id。
+    超时返回 []；Redis 不可用返回 None（由调用方退回 MongoDB 轮询）。
+    """
+    if database.redis_client is None:
+        return None
+    try:
+        item = await database.redis_client.blpop(SUBTASK_QUEUE_KEY, timeout=SUBTASK_POP_TIMEOUT)
+        if item is None:
+            return []
+        raw_ids = [item[1]]
+        if limit > 1:
+            raw_ids.extend(await database.redis_client.lpop(SUBTASK_QUEUE_KEY, limit - 1) or [])
+    except Exception as e:
+        print(f"✗ Redis 队列不可用，退回 MongoDB 轮询: {e}")
+        return None
+    return [ObjectId(i) for i in raw_ids if ObjectId.is_valid(i)]
 
 
 async def queue_create(
@@ -304,13 +525,16 @@ async def queue_create(
     mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     mongo_db_name = os.getenv("MONGO_DB", "industry_monitor")
     
+    redis_uri = os.getenv("REDIS_URI", "redis://localhost:6379/0")
+    
     await database.connect_to_mongo(mongo_uri, mongo_db_name)
+    await database.connect_to_redis(redis_uri)
     print("✓ 数据库连接成功")
     
     # 获取类目
     print("\n[2/3] 加载类目...")
     try:
-        cat_ids = get_top_level_cat_ids()
+        cat_ids = list(get_top_level_cat_ids())
         print(f"✓ 成功加载 {len(cat_ids)} 个一级类目")
     except Exception as e:
         print(f"✗ 加载类目失败: {e}")
@@ -324,21 +548,27 @@ async def queue_create(
     print(f"  类目数: {len(cat_ids)}")
     
     job_ids = []
-    for i, cat_id in enumerate(cat_ids, 1):
-        try:
-            job_id = await create_crawl_job(
-                start_date=start_date,
-                end_date=end_date,
-                granularities=granularities,
-                actions=actions,
-                cat_id=cat_id,
-                extra=None,
-            )
-            job_ids.append(job_id)
+    try:
+        job_ids = await create_crawl_jobs(
+            start_date=start_date,
+            end_date=end_date,
+            cat_ids=cat_ids,
+            granularities=granularities,
+            actions=actions,
+            extra=None,
+        )
+        for i, (cat_id, job_id) in enumerate(zip(cat_ids, job_ids), 1):
             print(f"  [{i}/{len(cat_ids)}] 创建任务: 类目 {cat_id}, Job ID: {job_id}")
-        except Exception as e:
-            print(f"  [{i}/{len(cat_ids)}] ✗ 创建失败: 类目 {cat_id}, 错误: {e}")
+    except Exception as e:
+        print(f"  ✗ 批量创建失败: {e}")
     
+    try:
+        pushed = await _enqueue_pending_subtasks(job_ids)
+        print(f"  已推入 Redis 队列: {pushed} 个子任务")
+    except Exception as e:
+        print(f"  ✗ 推入 Redis 队列失败（worker 将退回 MongoDB 轮询）: {e}")
+    
+    await database.disconnect_redis()
     await database.disconnect_mongo()
     
     print("\n" + "=" * 80)
@@ -350,13 +580,133 @@ async def queue_create(
     print("=" * 80)
 
 
+async def _handle_sub(
+    worker_id: int,
+    sub: dict,
+    cat_id: str,
+    extra: dict,
+    sem: asyncio.Semaphore,
+    rate: RateLimiter,
+):
+    """处理单个子任务，成功返回 None，失败返回错误信息（状态由调用方批量写回）"""
+    action = sub.get("action", "")
+    gran = sub.get("granularity", "day")
+    period_key = sub.get("period_key", "")
+    
+    # 先按全局速率排队再占并发槽位，槽位不会被睡眠占住；
+    # 命中缓存或失败时归还时间片，缓存命中不阻塞需要打到上游的 worker
+    await rate.wait()
+    slot = rate.reserve()
+    fresh = False
+    try:
+        async with sem:
+            if action == "industryTrendRange":
+                start_range, end_range = period_to_date_range(gran, period_key)
+                date_type = TREND_DATE_TYPES.get(gran, "DAY")
+                
+                res = await query_mengla(
+                    action=action,
+                    product_id="",
+                    catId=cat_id,
+                    dateType=date_type,
+                    timest="",
+                    starRange=start_range,
+                    endRange=end_range,
+                    extra=extra,
+                )
+            else:
+                res = await query_mengla(
+                    action=action,
+                    product_id="",
+                    catId=cat_id,
+                    dateType=gran,
+                    timest=period_key,
+                    starRange="",
+                    endRange="",
+                    extra=extra,
+                )
+        # 趋势接口 L3 部分命中时返回三元组，只取来源
+        fresh = res[1] == "fresh"
+    except Exception as e:
+        print(f"[Worker {worker_id}] ✗ {action}/{gran}/{period_key} - {e}")
+        return str(e)
+    finally:
+        if not fresh:
+            rate.release(slot)
+    
+    return None
+
+
+async def _process_batch(worker_id, job, subtasks, sem, rate):
+    """并发执行同一 job 下的一批子任务并批量写回结果，返回 (成功数, 失败数)"""
+    job_id = job["_id"]
+    
+    if job["status"] == JOB_PENDING:
+        await set_job_running(job_id)
+    
+    config = job.get("config") or {}
+    cat_id = config.get("catId", "") or ""
+    extra = config.get("extra") or {}
+    
+    results = await asyncio.gather(
+        *(
+            _handle_sub(worker_id, sub, cat_id, extra, sem, rate)
+            for sub in subtasks
+        ),
+        return_exceptions=True,
+    )
+    succeeded_ids = []
+    failed_pairs = []
+    for sub, r in zip(subtasks, results):
+        if r is None:
+            succeeded_ids.append(sub["_id"])
+        else:
+            failed_pairs.append((sub["_id"], str(r)))
+    await set_subtasks_finished(succeeded_ids, failed_pairs)
+    await inc_job_stats(job_id, completed_delta=len(succeeded_ids), failed_delta=len(failed_pairs))
+    await finish_job_if_done(job_id)
+    return len(succeeded_ids), len(failed_pairs)
+
+
+async def _load_queued_batches(worker_id, sub_ids, max_retries):
+    """
+    原子领取给定 _id 中仍为 PENDING 且未用尽重试次数的子任务，按所属 job 分组；
+    已取消/结束的 job 下的子任务不领取（保持 PENDING）
+    """
+    pending = await database.mongo_db[CRAWL_SUBTASKS].find(
+        {"_id": {"$in": sub_ids}, "status": SUB_PENDING, "attempts": {"$lt": max_retries}},
+        {"_id": 1, "job_id": 1},
+    ).to_list(length=len(sub_ids))
+    if not pending:
+        return []
+    jobs = await database.mongo_db[CRAWL_JOBS].find(
+        {"_id": {"$in": list({d["job_id"] for d in pending})}, "status": {"$in": [JOB_PENDING, JOB_RUNNING]}},
+    ).to_list(length=len(pending))
+    active = {job["_id"]: job for job in jobs}
+    subs = await claim_subtasks(
+        None,
+        limit=len(pending),
+        worker_id=f"backfill-{worker_id}",
+        max_attempts=max_retries,
+        ids=[d["_id"] for d in pending if d["job_id"] in active],
+    )
+    by_job = {}
+    for sub in subs:
+        by_job.setdefault(sub["job_id"], []).append(sub)
+    return [(active[job_id], batch) for job_id, batch in by_job.items()]
+
+
 async def _run_worker(
     worker_id: int,
-    sleep_min: float = 1.0,
-    sleep_max: float = 3.0,
+    sem: asyncio.Semaphore,
+    rate: RateLimiter,
     max_retries: int = 3,
 ):
-    """单个worker"""
+    """
+    单个worker：优先从 Redis 队列阻塞领取子任务；队列超时或 Redis 不可用时
+    退回 MongoDB 轮询（兼容未经 Redis 入队的任务）。每批子任务并发执行，
+    并发度由共享信号量限制，请求速率由共享 RateLimiter 限制。
+    """
     print(f"[Worker {worker_id}] 启动")
     
     processed = 0
@@ -364,101 +714,55 @@ async def _run_worker(
     
     while True:
         try:
+            sub_ids = await _pop_subtask_ids(limit=10)
+            if sub_ids:
+                for job, subtasks in await _load_queued_batches(worker_id, sub_ids, max_retries):
+                    ok, bad = await _process_batch(
+                        worker_id, job, subtasks, sem, rate,
+                    )
+                    processed += ok
+                    failed += bad
+                    print(f"[Worker {worker_id}] 已处理 {processed} 个，失败 {failed} 个")
+                continue
+            
             job = await get_next_job()
             if not job:
                 print(f"[Worker {worker_id}] 没有待处理任务，等待...")
-                await asyncio.sleep(10)
+                if sub_ids is None:
+                    # Redis 不可用时才需要自己等待；BLPOP 超时本身已经等过
+                    await asyncio.sleep(10)
                 continue
             
-            job_id = job["_id"]
-            
-            if job["status"] == JOB_PENDING:
-                await set_job_running(job_id)
-            
-            config = job.get("config") or {}
-            cat_id = config.get("catId", "") or ""
-            extra = config.get("extra") or {}
-            
-            subtasks = await get_pending_subtasks(job_id, limit=10)
+            # 原子领取，多个 worker 轮询同一 job 时不会重复处理同一子任务
+            subtasks = await claim_subtasks(
+                job["_id"], limit=10, worker_id=f"backfill-{worker_id}", max_attempts=max_retries,
+            )
             
             if not subtasks:
-                await finish_job_if_done(job_id)
+                # 剩余的 PENDING 可能都已用尽重试次数，先批量置为失败再尝试结束 job
+                await expire_exhausted_subtasks(max_retries, job_id=job["_id"])
+                await finish_job_if_done(job["_id"])
                 continue
             
-            for sub in subtasks:
-                sub_id = sub["_id"]
-                action = sub.get("action", "")
-                gran = sub.get("granularity", "day")
-                period_key = sub.get("period_key", "")
-                attempts = sub.get("attempts", 0)
-                
-                if attempts >= max_retries:
-                    await set_subtask_failed(sub_id, f"超过最大重试次数 {max_retries}")
-                    await inc_job_stats(job_id, completed_delta=0, failed_delta=1)
-                    failed += 1
-                    continue
-                
-                await set_subtask_running(sub_id)
-                
-                try:
-                    async with REQUEST_LOCK:
-                        if action == "industryTrendRange":
-                            start_range, end_range = period_to_date_range(gran, period_key)
-                            date_type = {
-                                "day": "DAY",
-                                "month": "MONTH",
-                                "quarter": "QUARTERLY_FOR_YEAR",
-                                "year": "YEAR",
-                            }.get(gran, "DAY")
-                            
-                            await query_mengla(
-                                action=action,
-                                product_id="",
-                                catId=cat_id,
-                                dateType=date_type,
-                                timest="",
-                                starRange=start_range,
-                                endRange=end_range,
-                                extra=extra,
-                            )
-                        else:
-                            await query_mengla(
-                                action=action,
-                                product_id="",
-                                catId=cat_id,
-                                dateType=gran,
-                                timest=period_key,
-                                starRange="",
-                                endRange="",
-                                extra=extra,
-                            )
-                        
-                        await asyncio.sleep(random.uniform(sleep_min, sleep_max))
-                    
-                    await set_subtask_success(sub_id)
-                    await inc_job_stats(job_id, completed_delta=1, failed_delta=0)
-                    processed += 1
-                    
-                    if processed % 10 == 0:
-                        print(f"[Worker {worker_id}] 已处理 {processed} 个，失败 {failed} 个")
-                    
-                except Exception as e:
-                    await set_subtask_failed(sub_id, str(e))
-                    await inc_job_stats(job_id, completed_delta=0, failed_delta=1)
-                    failed += 1
-                    print(f"[Worker {worker_id}] ✗ {action}/{gran}/{period_key} - {e}")
-            
-            await finish_job_if_done(job_id)
+            ok, bad = await _process_batch(
+                worker_id, job, subtasks, sem, rate,
+            )
+            processed += ok
+            failed += bad
+            print(f"[Worker {worker_id}] 已处理 {processed} 个，失败 {failed} 个")
             
-        except KeyboardInterrupt:
-            print(f"\n[Worker {worker_id}] 收到中断信号，退出...")
-            break
         except Exception as e:
             print(f"[Worker {worker_id}] ✗ 处理出错: {e}")
             await asyncio.sleep(5)
 
 
-async def queue_worker(num_workers: int, sleep_min: float, sleep_max: float):
+async def queue_worker(
+    num_workers: int,
+    sleep_min: float,
+    sleep_max: float,
+    concurrency: int = 3,
+    max_retries: int = 3,
+):
     """启动多个worker"""
     print("=" * 80)
     print(f"启动 {num_workers} 个Worker")
@@ -472,21 +776,25 @@ async def queue_worker(num_workers: int, sleep_min: float, sleep_max: float):
     await database.connect_to_redis(redis_uri)
     print("✓ 数据库连接成功")
     
-    print(f"\n启动 {num_workers} 个worker...")
+    expired = await expire_exhausted_subtasks(max_retries)
+    if expired:
+        print(f"✓ 已将 {expired} 个重试次数用尽的子任务标记为失败")
+    
+    print(f"\n启动 {num_workers} 个worker（上游并发上限 {concurrency}）...")
     print("按 Ctrl+C 停止\n")
     
-    workers = [
-        asyncio.create_task(_run_worker(i + 1, sleep_min, sleep_max))
-        for i in range(num_workers)
-    ]
+    sem = asyncio.Semaphore(max(1, concurrency))
+    # 所有 worker 共享：相邻两次上游请求至少间隔 sleep_min + [0, sleep_max - sleep_min) 秒
+    rate = RateLimiter(sleep_min, sleep_max - sleep_min)
     
     try:
-        await asyncio.gather(*workers)
-    except KeyboardInterrupt:
-        print("\n\n收到中断信号，停止所有worker...")
-        for w in workers:
-            w.cancel()
-        await asyncio.gather(*workers, return_exceptions=True)
+        # Ctrl+C 时 asyncio.run 取消主任务，TaskGroup 随之取消并等待所有 worker 退出
+        async with asyncio.TaskGroup() as tg:
+            for i in range(num_workers):
+                tg.create_task(_run_worker(i + 1, sem, rate, max_retries))
+    except asyncio.CancelledError:
+        print("\n\n收到中断信号，已停止所有worker")
+        raise
     finally:
         await database.disconnect_redis()
         await database.disconnect_mongo()
@@ -511,19 +819,25 @@ async def queue_status():
     jobs_coll = database.mongo_db[CRAWL_JOBS]
     subtasks_coll = database.mongo_db[CRAWL_SUBTASKS]
     
+    # 两个集合各一次 $group 聚合 + 运行中任务列表，三个查询并发执行
+    by_status = [{"$group": {"_id": "$status", "n": {"$sum": 1}}}]
+    job_groups, sub_groups, jobs = await asyncio.gather(
+        jobs_coll.aggregate(by_status).to_list(length=None),
+        subtasks_coll.aggregate(by_status).to_list(length=None),
+        jobs_coll.find({"status": JOB_RUNNING}).sort("created_at", 1).to_list(length=10),
+    )
+    job_counts = {g["_id"]: g["n"] for g in job_groups}
+    sub_counts = {g["_id"]: g["n"] for g in sub_groups}
+    
     print("\n任务统计：")
     for status in [JOB_PENDING, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED]:
-        count = await jobs_coll.count_documents({"status": status})
-        print(f"  {status}: {count}")
+        print(f"  {status}: {job_counts.get(status, 0)}")
     
     print("\n子任务统计：")
     for status in [SUB_PENDING, SUB_RUNNING, SUB_SUCCESS, SUB_FAILED]:
-        count = await subtasks_coll.count_documents({"status": status})
-        print(f"  {status}: {count}")
+        print(f"  {status}: {sub_counts.get(status, 0)}")
     
     print("\n正在运行的任务：")
-    cursor = jobs_coll.find({"status": JOB_RUNNING}).sort("created_at", 1)
-    jobs = await cursor.to_list(length=10)
     
     if not jobs:
         print("  无")
@@ -549,8 +863,6 @@ async def queue_status():
 
 async def queue_cancel(job_id_str: str):
     """取消任务"""
-    from bson import ObjectId
-    
     print(f"取消任务: {job_id_str}")
     
     mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
@@ -585,89 +897,145 @@ async def queue_cancel(job_id_str: str):
 # ==============================================================================
 # CLI 入口
 # ==============================================================================
-def _parse_date_range(args):
-    """解析时间范围参数"""
-    if args.start and args.end:
-        return args.start, args.end
-    elif args.days:
-        end_date = datetime.now() - timedelta(days=1)
-        start_date = end_date - timedelta(days=args.days - 1)
-    elif args.months:
-        end_date = datetime.now() - timedelta(days=1)
-        start_date = end_date - timedelta(days=args.months * 30)
-    elif args.years:
-        end_date = datetime.now() - timedelta(days=1)
-        start_date = end_date - timedelta(days=args.years * 365)
+_ONE_DAY = timedelta(days=1)
+_TWO_YEARS = timedelta(days=730)
+
+
+@lru_cache(maxsize=16)
+def _resolve_date_range(start, end, days, months, years, today):
+    """按参数元组缓存解析结果；today 参与缓存键，跨天后自动失效"""
+    if start and end:
+        return start, end
+    
+    end_date = today - _ONE_DAY
+    if days:
+        start_date = end_date - timedelta(days=days - 1)
+    elif months:
+        start_date = end_date - timedelta(days=months * 30)
+    elif years:
+        start_date = end_date - timedelta(days=years * 365)
     else:
         # 默认近两年
-        end_date = datetime.now() - timedelta(days=1)
-        start_date = end_date - timedelta(days=730)
+        start_date = end_date - _TWO_YEARS
     
-    return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+    return start_date.isoformat(), end_date.isoformat()
 
 
-def main():
-    parser = argparse.ArgumentParser(description="萌拉数据补录工具")
-    subparsers = parser.add_subparsers(dest="mode", help="补录模式")
-    
-    # single 模式
-    single_parser = subparsers.add_parser("single", help="简单补录（串行执行）")
-    single_parser.add_argument("--start", type=str, help="起始日期 yyyy-MM-dd")
-    single_parser.add_argument("--end", type=str, help="结束日期 yyyy-MM-dd")
-    single_parser.add_argument("--days", type=int, help="最近N天")
-    single_parser.add_argument("--months", type=int, help="最近N个月")
-    single_parser.add_argument("--years", type=int, help="最近N年")
-    single_parser.add_argument(
+def _parse_date_range(args):
+    """解析时间范围参数"""
+    # argparse.Namespace 不可哈希，先取出相关字段组成缓存键
+    return _resolve_date_range(
+        args.start, args.end, args.days, args.months, args.years,
+        datetime.now().date(),
+    )
+
+
+@lru_cache(maxsize=1)
+def _range_parent():
+    """single 与 queue create 共用的时间范围/接口/颗粒度参数（只构建一次）"""
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument("--start", type=str, help="起始日期 yyyy-MM-dd")
+    parent.add_argument("--end", type=str, help="结束日期 yyyy-MM-dd")
+    parent.add_argument("--days", type=int, help="最近N天")
+    parent.add_argument("--months", type=int, help="最近N个月")
+    parent.add_argument("--years", type=int, help="最近N年")
+    parent.add_argument(
         "--actions", nargs="+",
         default=["high", "hot", "chance", "industryViewV2", "industryTrendRange"],
         help="要采集的接口",
     )
-    single_parser.add_argument(
+    parent.add_argument(
         "--granularities", nargs="+",
         default=["day", "month", "quarter", "year"],
         help="要采集的颗粒度",
     )
+    return parent
+
+
+def _add_single_parser(subparsers, argv):
+    single_parser = subparsers.add_parser(
+        "single", parents=[_range_parent()], help="简单补录（串行执行）"
+    )
     single_parser.add_argument("--cat-ids", nargs="+", help="指定类目ID")
     single_parser.add_argument("--no-resume", action="store_true", help="不使用断点续传")
     single_parser.add_argument("--sleep-min", type=float, default=1.0, help="最小休眠（秒）")
     single_parser.add_argument("--sleep-max", type=float, default=3.0, help="最大休眠（秒）")
+    single_parser.add_argument("--parallel-cats", type=int, default=3, help="同时处理的类目数")
+    single_parser.add_argument("--progress-every", type=int, default=100, help="每完成N个任务输出一次进度")
+    single_parser.add_argument("--verbose", action="store_true", help="输出逐类目/接口的详细日志")
     single_parser.add_argument("--clear-progress", action="store_true", help="清除进度文件")
-    
-    # queue 模式
-    queue_parser = subparsers.add_parser("queue", help="队列补录（多worker）")
-    queue_subparsers = queue_parser.add_subparsers(dest="queue_cmd", help="队列命令")
-    
-    # queue create
-    create_parser = queue_subparsers.add_parser("create", help="创建队列任务")
-    create_parser.add_argument("--start", type=str, help="起始日期")
-    create_parser.add_argument("--end", type=str, help="结束日期")
-    create_parser.add_argument("--days", type=int, help="最近N天")
-    create_parser.add_argument("--months", type=int, help="最近N个月")
-    create_parser.add_argument("--years", type=int, help="最近N年")
-    create_parser.add_argument("--actions", nargs="+",
-        default=["high", "hot", "chance", "industryViewV2", "industryTrendRange"])
-    create_parser.add_argument("--granularities", nargs="+",
-        default=["day", "month", "quarter", "year"])
-    
-    # queue worker
+
+
+def _add_queue_create_parser(queue_subparsers):
+    queue_subparsers.add_parser(
+        "create", parents=[_range_parent()], help="创建队列任务"
+    )
+
+
+def _add_queue_worker_parser(queue_subparsers):
     worker_parser = queue_subparsers.add_parser("worker", help="启动worker")
     worker_parser.add_argument("--workers", type=int, default=3, help="worker数量")
     worker_parser.add_argument("--sleep-min", type=float, default=1.0)
     worker_parser.add_argument("--sleep-max", type=float, default=3.0)
-    
-    # queue status
+    worker_parser.add_argument("--concurrency", type=int, default=3, help="所有worker共享的上游请求并发上限")
+
+
+def _add_queue_status_parser(queue_subparsers):
     queue_subparsers.add_parser("status", help="查看队列状态")
-    
-    # queue cancel
+
+
+def _add_queue_cancel_parser(queue_subparsers):
     cancel_parser = queue_subparsers.add_parser("cancel", help="取消任务")
     cancel_parser.add_argument("job_id", type=str, help="任务ID")
+
+
+_QUEUE_PARSERS = {
+    "create": _add_queue_create_parser,
+    "worker": _add_queue_worker_parser,
+    "status": _add_queue_status_parser,
+    "cancel": _add_queue_cancel_parser,
+}
+
+
+def _add_queue_parser(subparsers, argv):
+    queue_parser = subparsers.add_parser("queue", help="队列补录（多worker）")
+    queue_parser.set_defaults(print_help=queue_parser.print_help)
+    queue_subparsers = queue_parser.add_subparsers(dest="queue_cmd", help="队列命令")
+    cmd = argv[0] if argv else None
+    for name in [cmd] if cmd in _QUEUE_PARSERS else _QUEUE_PARSERS:
+        _QUEUE_PARSERS[name](queue_subparsers)
+
+
+_MODE_PARSERS = {
+    "single": _add_single_parser,
+    "queue": _add_queue_parser,
+}
+
+
+def _build_parser(argv):
+    """
+    只构建命令行实际命中的子命令解析器；
+    未命中（如顶层 -h 或拼写错误）时才构建全部，保证帮助与报错信息完整。
+    """
+    parser = argparse.ArgumentParser(description="萌拉数据补录工具")
+    parser.set_defaults(print_help=parser.print_help)
+    subparsers = parser.add_subparsers(dest="mode", help="补录模式")
+    mode = argv[0] if argv else None
+    for name in [mode] if mode in _MODE_PARSERS else _MODE_PARSERS:
+        _MODE_PARSERS[name](subparsers, argv[1:])
+    return parser
+
+
+def main():
+    argv = sys.argv[1:]
+    parser = _build_parser(argv)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if args.mode == "single":
         if args.clear_progress:
-            if PROGRESS_FILE.exists():
-                PROGRESS_FILE.unlink()
+            if any(p.exists() for p in (PROGRESS_FILE, PROGRESS_JOURNAL, FAILED_LOG)):
+                clear_progress()
                 print(f"✓ 已清除进度文件: {PROGRESS_FILE}")
             return
         
@@ -676,36 +1044,42 @@ def main():
         cat_ids = args.cat_ids
         if not cat_ids:
             try:
-                cat_ids = get_top_level_cat_ids()
+                cat_ids = list(get_top_level_cat_ids())
             except Exception:
                 cat_ids = [""]
         
-        asyncio.run(backfill_data(
-            start_date=start_date,
-            end_date=end_date,
-            actions=args.actions,
-            granularities=args.granularities,
-            cat_ids=cat_ids,
-            resume=not args.no_resume,
-            sleep_min=args.sleep_min,
-            sleep_max=args.sleep_max,
-        ))
+        listener = _setup_console_logging(args.verbose)
+        try:
+            asyncio.run(backfill_data(
+                start_date=start_date,
+                end_date=end_date,
+                actions=args.actions,
+                granularities=args.granularities,
+                cat_ids=cat_ids,
+                resume=not args.no_resume,
+                sleep_min=args.sleep_min,
+                sleep_max=args.sleep_max,
+                parallel_cats=args.parallel_cats,
+                progress_every=args.progress_every,
+            ))
+        finally:
+            listener.stop()
     
     elif args.mode == "queue":
         if args.queue_cmd == "create":
             start_date, end_date = _parse_date_range(args)
             asyncio.run(queue_create(start_date, end_date, args.actions, args.granularities))
         elif args.queue_cmd == "worker":
-            asyncio.run(queue_worker(args.workers, args.sleep_min, args.sleep_max))
+            asyncio.run(queue_worker(args.workers, args.sleep_min, args.sleep_max, args.concurrency))
         elif args.queue_cmd == "status":
             asyncio.run(queue_status())
         elif args.queue_cmd == "cancel":
             asyncio.run(queue_cancel(args.job_id))
         else:
-            queue_parser.print_help()
+            args.print_help()
     
     else:
-        parser.print_help()
+        args.print_help()
 
 
 if __name__ == "__main__":
@@ -53,6 +53,9 @@ LEGACY_REDIS_PREFIXES = [
     "mengla:trend:",
 ]
 
+# 每条 UNLINK 命令携带的 key 数量上限
+_UNLINK_CHUNK = 512
+
 
 async def get_collection_stats() -> List[Tuple[str, int]]:
     """获取各集合的文档数量"""
@@ -60,81 +63,99 @@ async def get_collection_stats() -> List[Tuple[str, int]]:
     if database.mongo_db is None:
         return stats
     
-    for name in LEGACY_COLLECTIONS:
-        try:
-            coll = database.mongo_db[name]
-            count = await coll.count_documents({})
-            stats.append((name, count))
-        except Exception as e:
-            stats.append((name, -1))
-            print(f"  [错误] {name}: {e}")
-    
-    # 新集合统计
+    names = LEGACY_COLLECTIONS + ["mengla_data"]
+    # 先一次性取出已存在的集合，不存在的直接记 0，避免逐个计数
     try:
-        new_coll = database.mongo_db["mengla_data"]
-        new_count = await new_coll.count_documents({})
-        stats.append(("mengla_data (新)", new_count))
+        existing = set(await database.mongo_db.list_collection_names())
     except Exception as e:
-        stats.append(("mengla_data (新)", -1))
+        print(f"  [错误] 获取集合列表失败: {e}")
+        existing = set(names)
+    
+    # estimated_document_count 读取集合元数据，无需扫描；各集合并发查询
+    present = [name for name in names if name in existing]
+    counts = await asyncio.gather(
+        *(database.mongo_db[name].estimated_document_count() for name in present),
+        return_exceptions=True,
+    )
+    by_name = dict(zip(present, counts))
+    
+    for name in names:
+        count = by_name.get(name, 0)
+        if isinstance(count, BaseException):
+            if name in LEGACY_COLLECTIONS:
+                print(f"  [错误] {name}: {count}")
+            count = -1
+        label = "mengla_data (新)" if name == "mengla_data" else name
+        stats.append((label, count))
     
     return stats
 
 
+async def _drop_one(name: str, dry_run: bool) -> Tuple[str, bool, str]:
+    """删除单个旧集合"""
+    try:
+        if dry_run:
+            return (name, True, "预览模式，未删除")
+        await database.mongo_db.drop_collection(name)
+        return (name, True, "已删除")
+    except Exception as e:
+        return (name, False, str(e))
+
+
 async def drop_legacy_collections(dry_run: bool = True) -> List[Tuple[str, bool, str]]:
     """删除旧集合"""
-    results = []
     if database.mongo_db is None:
-        return results
+        return []
     
-    for name in LEGACY_COLLECTIONS:
-        try:
-            if dry_run:
-                results.append((name, True, "预览模式，未删除"))
-            else:
-                await database.mongo_db.drop_collection(name)
-                results.append((name, True, "已删除"))
-        except Exception as e:
-            results.append((name, False, str(e)))
-    
-    return results
+    # 不同集合的 drop 互不影响，并发执行
+    return list(await asyncio.gather(
+        *(_drop_one(name, dry_run) for name in LEGACY_COLLECTIONS)
+    ))
+
+
+async def _scan_and_unlink(prefix: str, dry_run: bool) -> Tuple[int, int]:
+    """扫描单个前缀，按 _UNLINK_CHUNK 分块 UNLINK，内存占用与 key 总量无关"""
+    found = 0
+    deleted = 0
+    cursor = 0
+    buf: List[str] = []
+    try:
+        while True:
+            cursor, keys = await database.redis_client.scan(
+                cursor=cursor, 
+                match=f"{prefix}*", 
+                count=1000
+            )
+            found += len(keys)
+            buf.extend(keys)
+            while len(buf) >= _UNLINK_CHUNK or (cursor == 0 and buf):
+                chunk = buf[:_UNLINK_CHUNK]
+                del buf[:_UNLINK_CHUNK]
+                if dry_run:
+                    deleted += len(chunk)  # 预览模式，假设全部删除
+                else:
+                    # UNLINK 在 Redis 后台线程回收内存，不阻塞主线程
+                    deleted += await database.redis_client.unlink(*chunk)
+            if cursor == 0:
+                break
+    except Exception as e:
+        print(f"  [错误] Redis prefix {prefix}: {e}")
+    return (found, deleted)
 
 
 async def cleanup_legacy_redis_keys(dry_run: bool = True) -> Tuple[int, int]:
-    """清理旧 Redis key"""
+    """清理旧 Redis key（各前缀并发扫描）"""
     if database.redis_client is None:
         return (0, 0)
     
-    total_found = 0
-    total_deleted = 0
-    
-    for prefix in LEGACY_REDIS_PREFIXES:
-        try:
-            # 使用 SCAN 遍历匹配的 key
-            cursor = 0
-            keys_to_delete = []
-            
-            while True:
-                cursor, keys = await database.redis_client.scan(
-                    cursor=cursor, 
-                    match=f"{prefix}*", 
-                    count=1000
-                )
-                keys_to_delete.extend(keys)
-                if cursor == 0:
-                    break
-            
-            total_found += len(keys_to_delete)
-            
-            if keys_to_delete and not dry_run:
-                # 批量删除
-                deleted = await database.redis_client.delete(*keys_to_delete)
-                total_deleted += deleted
-            elif keys_to_delete and dry_run:
-                total_deleted += len(keys_to_delete)  # 预览模式，假设全部删除
-                
-        except Exception as e:
-            print(f"  [错误] Redis prefix {prefix}: {e}")
+    tasks = [
+        asyncio.create_task(_scan_and_unlink(prefix, dry_run))
+        for prefix in LEGACY_REDIS_PREFIXES
+    ]
+    counts = await asyncio.gather(*tasks)
     
+    total_found = sum(found for found, _ in counts)
+    total_deleted = sum(deleted for _, deleted in counts)
     return (total_found, total_deleted)
 
 
@@ -160,14 +181,14 @@ async def main():
     args = parser.parse_args()
     dry_run = not args.confirm
     
-    print("=" * 60)
-    print("MengLa 旧数据清理工具")
-    print("=" * 60)
-    
-    if dry_run:
-        print("\n[预览模式] 不会实际删除数据，使用 --confirm 执行删除\n")
-    else:
-        print("\n[!] 即将执行删除操作 [!]\n")
+    banner = [
+        "=" * 60,
+        "MengLa 旧数据清理工具",
+        "=" * 60,
+        "\n[预览模式] 不会实际删除数据，使用 --confirm 执行删除\n" if dry_run
+        else "\n[!] 即将执行删除操作 [!]\n",
+    ]
+    sys.stdout.write("\n".join(banner) + "\n")
     
     # 1. 连接数据库
     print("1. 连接数据库...")
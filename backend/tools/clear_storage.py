@@ -3,27 +3,29 @@
 
 用法（在项目根目录）：
   python -m backend.scripts.clear_storage
-  python -m backend.scripts.clear_storage --confirm  # 跳过确认
+  python -m backend.scripts.clear_storage --confirm  # 跳过确认（别名 --yes）
 """
 from pathlib import Path
 import argparse
 import asyncio
 import os
 
-# 加载项目根目录 .env
-_env_path = Path(__file__).resolve().parent.parent.parent / ".env"
-if _env_path.exists():
-    try:
-        from dotenv import load_dotenv
-        load_dotenv(dotenv_path=_env_path)
-    except ImportError:
-        pass
-
 MONGO_URI_DEFAULT = "mongodb://localhost:27017"
 MONGO_DB_DEFAULT = "industry_monitor"
 REDIS_URI_DEFAULT = "redis://localhost:6379/0"
 
 
+def _load_env() -> None:
+    """加载项目根目录 .env（解析参数之后再调用，--help 不付出这部分开销）"""
+    env_path = Path(__file__).resolve().parent.parent.parent / ".env"
+    if env_path.exists():
+        try:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=env_path)
+        except ImportError:
+            pass
+
+
 async def clear_mongo(verbose: bool = True):
     """清除 MongoDB 数据"""
     import motor.motor_asyncio
@@ -69,6 +71,7 @@ async def clear_redis(verbose: bool = True):
 
 async def main(skip_confirm: bool = False):
     """主函数"""
+    _load_env()
     print("=" * 60)
     print("清除存储数据")
     print("=" * 60)
@@ -79,20 +82,31 @@ async def main(skip_confirm: bool = False):
     
     if not skip_confirm:
         print("\n⚠️  警告：此操作将删除所有数据！")
-        confirm = input("确认清除？(输入 yes 继续): ").strip().lower()
+        # input() 放到线程池执行，不阻塞事件循环；管道输入（echo yes | ...）同样适用
+        loop = asyncio.get_running_loop()
+        confirm = (await loop.run_in_executor(None, input, "确认清除？(输入 yes 继续): ")).strip().lower()
         if confirm != "yes":
             print("已取消")
             return
     
     print("\n开始清除...")
-    await clear_mongo()
-    await clear_redis()
+    # Mongo 与 Redis 互不依赖，并行清除
+    results = await asyncio.gather(clear_mongo(), clear_redis(), return_exceptions=True)
+    errors = [
+        (name, r) for name, r in zip(("MongoDB", "Redis"), results)
+        if isinstance(r, BaseException)
+    ]
+    if errors:
+        print("\n✗ 清除未全部完成:")
+        for name, err in errors:
+            print(f"  {name}: {err}")
+        raise SystemExit(1)
     print("\n✓ 清除完成")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="清除存储数据")
-    parser.add_argument("--confirm", action="store_true", help="跳过确认直接执行")
+    parser.add_argument("--confirm", "--yes", action="store_true", help="跳过确认直接执行")
     args = parser.parse_args()
     
     asyncio.run(main(skip_confirm=args.confirm))
@@ -11,89 +11,142 @@
 """
 import argparse
 import asyncio
+import functools
+import io
 import os
 import sys
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional, TextIO
 
-try:
-    from dotenv import load_dotenv
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+def _maybe_load_dotenv() -> None:
+    """解析完命令行后再加载 .env，`-h` 等路径无需导入 dotenv"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
     load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
-except ImportError:
-    pass
 
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+# 进程内复用的 HTTP 客户端（按需创建，诊断结束时关闭）
+_http_client = None
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=10),
+        )
+    return _http_client
+
+
+async def _close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# ==============================================================================
+# 检查结果
+# ==============================================================================
+@dataclass(slots=True)
+class CheckResult:
+    """单项检查的结果；检查细节（连接状态、计数等）放在 extra 中"""
+    all_ok: bool = False
+    error: Optional[str] = None
+    extra: dict = field(default_factory=dict)
+
+
+def _to_result(details: dict) -> CheckResult:
+    all_ok = bool(details.pop("_all_ok", False))
+    return CheckResult(all_ok=all_ok, error=details.pop("error", None), extra=details)
 
 
 # ==============================================================================
 # 环境变量检查
 # ==============================================================================
-def check_env_vars(verbose: bool = True) -> dict:
+# (变量名, 默认值, 是否必需, 是否敏感)
+_VARS_CONFIG = (
+    ("MONGO_URI", "mongodb://localhost:27017", True, False),
+    ("MONGO_DB", "industry_monitor", True, False),
+    ("REDIS_URI", "redis://localhost:6379/0", True, False),
+    ("COLLECT_SERVICE_URL", "", True, False),
+    ("COLLECT_SERVICE_API_KEY", "", True, True),
+    ("APP_BASEURL", "http://localhost:8000", False, False),
+    ("MENGLA_WEBHOOK_URL", "", False, False),
+    ("MENGLA_TIMEOUT_SECONDS", "3600", False, False),
+)
+
+# 远程采集服务无法回调的本机地址
+_LOCAL_HOSTS = ("localhost", "127.0.0.1")
+
+
+def check_env_vars(verbose: bool = True) -> CheckResult:
     """检查环境变量"""
-    if verbose:
-        print("\n" + "=" * 80)
-        print("环境变量检查")
-        print("=" * 80)
-    
-    vars_config = {
-        "MONGO_URI": {"default": "mongodb://localhost:27017", "required": True},
-        "MONGO_DB": {"default": "industry_monitor", "required": True},
-        "REDIS_URI": {"default": "redis://localhost:6379/0", "required": True},
-        "COLLECT_SERVICE_URL": {"default": "", "required": True},
-        "COLLECT_SERVICE_API_KEY": {"default": "", "required": True, "secret": True},
-        "APP_BASEURL": {"default": "http://localhost:8000", "required": False},
-        "MENGLA_WEBHOOK_URL": {"default": "", "required": False},
-        "MENGLA_TIMEOUT_SECONDS": {"default": "3600", "required": False},
-    }
+    # 输出先收集到 lines，最后一次性写出
+    lines = ["", "=" * 80, "环境变量检查", "=" * 80]
     
     results = {}
     all_ok = True
+    environ = os.environ
     
-    for var, config in vars_config.items():
-        value = os.getenv(var, config["default"])
+    for var, default, required, secret in _VARS_CONFIG:
+        value = environ.get(var, default)
         is_set = bool(value)
-        is_ok = is_set or not config["required"]
+        is_ok = is_set or not required
         
         results[var] = {
             "value": value,
             "is_set": is_set,
             "is_ok": is_ok,
-            "required": config["required"],
+            "required": required,
         }
         
         if verbose:
             if is_set:
-                if config.get("secret"):
+                if secret:
                     display = value[:10] + "..." + value[-5:] if len(value) > 15 else "***"
                 else:
                     display = value
-                print(f"✓ {var:30s} = {display}")
+                lines.append("✓ " + var.ljust(30) + " = " + display)
             else:
-                status = "✗" if config["required"] else "○"
-                print(f"{status} {var:30s} = (未设置)")
+                status = "✗" if required else "○"
+                lines.append(status + " " + var.ljust(30) + " = (未设置)")
         
-        if config["required"] and not is_set:
+        if required and not is_set:
             all_ok = False
     
-    # Webhook 特别提示
-    webhook_url = os.getenv("MENGLA_WEBHOOK_URL")
+    # Webhook 特别提示（复用上面已读取的值）
+    webhook_url = results["MENGLA_WEBHOOK_URL"]["value"]
     if verbose:
         if webhook_url:
-            print(f"\n提示: 使用外部 Webhook: {webhook_url}")
-            if "localhost" in webhook_url or "127.0.0.1" in webhook_url:
-                print("  ⚠ 警告：localhost 地址，远程采集服务无法访问！")
+            lines.append(f"\n提示: 使用外部 Webhook: {webhook_url}")
+            if any(host in webhook_url for host in _LOCAL_HOSTS):
+                lines.append("  ⚠ 警告：localhost 地址，远程采集服务无法访问！")
         else:
-            app_base = os.getenv("APP_BASEURL", "http://localhost:8000")
-            print(f"\n提示: 使用本地 Webhook: {app_base}/api/webhook/mengla-notify")
+            app_base = results["APP_BASEURL"]["value"]
+            lines.append(f"\n提示: 使用本地 Webhook: {app_base}/api/webhook/mengla-notify")
+        sys.stdout.write("\n".join(lines))
+        sys.stdout.write("\n")
     
     results["_all_ok"] = all_ok
-    return results
+    return _to_result(results)
 
 
 # ==============================================================================
 # 数据检查
 # ==============================================================================
-async def check_data(verbose: bool = True) -> dict:
-    """检查 MongoDB 数据"""
+async def check_data(
+    verbose: bool = True, db=None, connect_error: Optional[BaseException] = None
+) -> CheckResult:
+    """检查 MongoDB 数据（传入 db 时复用调用方的连接，不自行连接/断开；
+    传入 connect_error 表示调用方连接已失败，直接报告不再重连）"""
     if verbose:
         print("\n" + "=" * 80)
         print("MongoDB 数据检查")
@@ -102,17 +155,25 @@ async def check_data(verbose: bool = True) -> dict:
     from backend.infra import database
     
     results = {"collections": {}, "_all_ok": False}
+    if connect_error is not None:
+        results["error"] = str(connect_error)
+        if verbose:
+            print(f"✗ 数据库未连接: {connect_error}")
+        return _to_result(results)
+    owns_conn = db is None
     
     try:
         mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
         mongo_db_name = os.getenv("MONGO_DB", "industry_monitor")
         
-        await database.connect_to_mongo(mongo_uri, mongo_db_name)
+        if owns_conn:
+            await database.connect_to_mongo(mongo_uri, mongo_db_name)
+            db = database.mongo_db
         
-        if database.mongo_db is None:
+        if db is None:
             if verbose:
                 print("✗ 数据库未连接")
-            return results
+            return _to_result(results)
         
         # 检查各集合
         collections = [
@@ -125,30 +186,44 @@ async def check_data(verbose: bool = True) -> dict:
             print(f"\n{'集合名':<30s} {'数量':>10s}   {'描述'}")
             print("-" * 80)
         
+        async def _inspect(coll_name: str):
+            coll = db[coll_name]
+            count = await coll.count_documents({})
+            latest = None
+            # 最新时间只在 verbose 时打印，非 verbose 不查询
+            if verbose and count > 0:
+                # 只取 created_at 字段；有 created_at 索引时走索引，否则仍是一次排序取首条
+                doc = await coll.find_one({}, {"created_at": 1}, sort=[("created_at", -1)])
+                if doc:
+                    latest = doc.get("created_at")
+            return count, latest
+        
+        # 各集合的统计互不依赖，并发查询
+        outcomes = await asyncio.gather(
+            *(_inspect(coll_name) for coll_name, _ in collections),
+            return_exceptions=True,
+        )
+        
         total_count = 0
-        for coll_name, desc in collections:
-            try:
-                coll = database.mongo_db[coll_name]
-                count = await coll.count_documents({})
-                total_count += count
-                
-                results["collections"][coll_name] = {
-                    "count": count,
-                    "description": desc,
-                }
-                
-                if verbose:
-                    print(f"{coll_name:<30s} {count:>10,d}   {desc}")
-                    
-                    if count > 0:
-                        # 显示最新数据时间
-                        latest = await coll.find_one(sort=[("created_at", -1)])
-                        if latest and "created_at" in latest:
-                            print(f"  └─ 最新: {latest.get('created_at')}")
-            except Exception as e:
-                results["collections"][coll_name] = {"error": str(e)}
+        for (coll_name, desc), outcome in zip(collections, outcomes):
+            if isinstance(outcome, BaseException):
+                results["collections"][coll_name] = {"error": str(outcome)}
                 if verbose:
-                    print(f"{coll_name:<30s} {'错误':>10s}   {e}")
+                    print(f"{coll_name:<30s} {'错误':>10s}   {outcome}")
+                continue
+            
+            count, latest = outcome
+            total_count += count
+            results["collections"][coll_name] = {
+                "count": count,
+                "description": desc,
+            }
+            
+            if verbose:
+                print(f"{coll_name:<30s} {count:>10,d}   {desc}")
+                if latest is not None:
+                    # 显示最新数据时间
+                    print(f"  └─ 最新: {latest}")
         
         if verbose:
             print("-" * 80)
@@ -157,98 +232,130 @@ async def check_data(verbose: bool = True) -> dict:
         results["total_count"] = total_count
         results["_all_ok"] = True
         
-        await database.disconnect_mongo()
+        if owns_conn:
+            await database.disconnect_mongo()
         
     except Exception as e:
         if verbose:
             print(f"✗ 数据检查失败: {e}")
         results["error"] = str(e)
     
-    return results
+    return _to_result(results)
 
 
 # ==============================================================================
 # 服务连接检查
 # ==============================================================================
-async def check_redis(verbose: bool = True) -> dict:
-    """检查 Redis 连接"""
+async def check_redis(
+    verbose: bool = True,
+    out: Optional[TextIO] = None,
+    client=None,
+    connect_error: Optional[BaseException] = None,
+) -> CheckResult:
+    """检查 Redis 连接（传入 client 时复用调用方的连接；
+    传入 connect_error 表示调用方连接已失败，直接报告不再重连）"""
     if verbose:
-        print("\n" + "=" * 80)
-        print("Redis 连接检查")
-        print("=" * 80)
+        print("\n" + "=" * 80, file=out)
+        print("Redis 连接检查", file=out)
+        print("=" * 80, file=out)
     
     from backend.infra import database
     
     results = {"connected": False, "read_write": False}
+    if connect_error is not None:
+        results["error"] = str(connect_error)
+        if verbose:
+            print(f"✗ Redis 连接失败: {connect_error}", file=out)
+            print("  提示: 请确保 Redis 正在运行", file=out)
+        return _to_result(results)
+    owns_conn = client is None
     
     try:
         redis_uri = os.getenv("REDIS_URI", "redis://localhost:6379/0")
         if verbose:
-            print(f"连接: {redis_uri}")
+            print(f"连接: {redis_uri}", file=out)
         
-        await database.connect_to_redis(redis_uri)
+        if owns_conn:
+            await database.connect_to_redis(redis_uri)
+            client = database.redis_client
         
-        if database.redis_client is None:
+        if client is None:
             if verbose:
-                print("✗ Redis 连接失败")
-            return results
+                print("✗ Redis 连接失败", file=out)
+            return _to_result(results)
         
         results["connected"] = True
         
         # 测试读写
         test_key = "mengla:test:diagnose"
-        await database.redis_client.set(test_key, "ok", ex=10)
-        value = await database.redis_client.get(test_key)
+        await client.set(test_key, "ok", ex=10)
+        value = await client.get(test_key)
         
         if value == "ok":
             results["read_write"] = True
-            await database.redis_client.delete(test_key)
+            await client.delete(test_key)
             if verbose:
-                print("✓ Redis 连接成功，读写正常")
+                print("✓ Redis 连接成功，读写正常", file=out)
         else:
             if verbose:
-                print("✗ Redis 读写失败")
+                print("✗ Redis 读写失败", file=out)
         
-        await database.disconnect_redis()
+        if owns_conn:
+            await database.disconnect_redis()
         
     except Exception as e:
         results["error"] = str(e)
         if verbose:
-            print(f"✗ Redis 连接失败: {e}")
-            print("  提示: 请确保 Redis 正在运行")
+            print(f"✗ Redis 连接失败: {e}", file=out)
+            print("  提示: 请确保 Redis 正在运行", file=out)
     
     results["_all_ok"] = results["connected"] and results["read_write"]
-    return results
+    return _to_result(results)
 
 
-async def check_mongo(verbose: bool = True) -> dict:
-    """检查 MongoDB 连接"""
+async def check_mongo(
+    verbose: bool = True,
+    out: Optional[TextIO] = None,
+    db=None,
+    connect_error: Optional[BaseException] = None,
+) -> CheckResult:
+    """检查 MongoDB 连接（传入 db 时复用调用方的连接；
+    传入 connect_error 表示调用方连接已失败，直接报告不再重连）"""
     if verbose:
-        print("\n" + "=" * 80)
-        print("MongoDB 连接检查")
-        print("=" * 80)
+        print("\n" + "=" * 80, file=out)
+        print("MongoDB 连接检查", file=out)
+        print("=" * 80, file=out)
     
     from backend.infra import database
     
     results = {"connected": False, "read_write": False}
+    if connect_error is not None:
+        results["error"] = str(connect_error)
+        if verbose:
+            print(f"✗ MongoDB 连接失败: {connect_error}", file=out)
+            print("  提示: 请确保 MongoDB 正在运行", file=out)
+        return _to_result(results)
+    owns_conn = db is None
     
     try:
         mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
         mongo_db_name = os.getenv("MONGO_DB", "industry_monitor")
         if verbose:
-            print(f"连接: {mongo_uri}/{mongo_db_name}")
+            print(f"连接: {mongo_uri}/{mongo_db_name}", file=out)
         
-        await database.connect_to_mongo(mongo_uri, mongo_db_name)
+        if owns_conn:
+            await database.connect_to_mongo(mongo_uri, mongo_db_name)
+            db = database.mongo_db
         
-        if database.mongo_db is None:
+        if db is None:
             if verbose:
-                print("✗ MongoDB 连接失败")
-            return results
+                print("✗ MongoDB 连接失败", file=out)
+            return _to_result(results)
         
         results["connected"] = True
         
         # 测试读写
-        test_coll = database.mongo_db["_test_diagnose"]
+        test_coll = db["_test_diagnose"]
         await test_coll.insert_one({"test": "ok"})
         doc = await test_coll.find_one({"test": "ok"})
         await test_coll.delete_many({})
@@ -256,87 +363,96 @@ async def check_mongo(verbose: bool = True) -> dict:
         if doc:
             results["read_write"] = True
             if verbose:
-                print("✓ MongoDB 连接成功，读写正常")
+                print("✓ MongoDB 连接成功，读写正常", file=out)
         else:
             if verbose:
-                print("✗ MongoDB 读写失败")
+                print("✗ MongoDB 读写失败", file=out)
         
-        await database.disconnect_mongo()
+        if owns_conn:
+            await database.disconnect_mongo()
         
     except Exception as e:
         results["error"] = str(e)
         if verbose:
-            print(f"✗ MongoDB 连接失败: {e}")
-            print("  提示: 请确保 MongoDB 正在运行")
+            print(f"✗ MongoDB 连接失败: {e}", file=out)
+            print("  提示: 请确保 MongoDB 正在运行", file=out)
     
     results["_all_ok"] = results["connected"] and results["read_write"]
-    return results
+    return _to_result(results)
 
 
-async def check_fastapi(verbose: bool = True) -> dict:
+async def check_fastapi(verbose: bool = True, out: Optional[TextIO] = None) -> CheckResult:
     """检查 FastAPI 服务"""
     if verbose:
-        print("\n" + "=" * 80)
-        print("FastAPI 服务检查")
-        print("=" * 80)
+        print("\n" + "=" * 80, file=out)
+        print("FastAPI 服务检查", file=out)
+        print("=" * 80, file=out)
     
     results = {"running": False}
     
     try:
-        import httpx
         app_base = os.getenv("APP_BASEURL", "http://localhost:8000")
         health_url = f"{app_base}/health"
         if verbose:
-            print(f"检查: {health_url}")
+            print(f"检查: {health_url}", file=out)
         
-        async with httpx.AsyncClient(timeout=3.0) as client:
-            resp = await client.get(health_url)
+        resp = await _get_http_client().get(health_url, timeout=3.0)
         
         if resp.status_code == 200:
             results["running"] = True
             if verbose:
-                print("✓ FastAPI 服务正在运行")
-                print(f"  Webhook: {app_base}/api/webhook/mengla-notify")
+                print("✓ FastAPI 服务正在运行", file=out)
+                print(f"  Webhook: {app_base}/api/webhook/mengla-notify", file=out)
         else:
             if verbose:
-                print(f"✗ FastAPI 服务响应异常: {resp.status_code}")
+                print(f"✗ FastAPI 服务响应异常: {resp.status_code}", file=out)
                 
     except Exception as e:
         results["error"] = str(e)
         if verbose:
-            print(f"✗ FastAPI 服务未运行")
-            print("  启动命令: uvicorn backend.main:app --reload")
+            print(f"✗ FastAPI 服务未运行", file=out)
+            print("  启动命令: uvicorn backend.main:app --reload", file=out)
     
     results["_all_ok"] = results["running"]
-    return results
+    return _to_result(results)
 
 
-async def check_collect_service(verbose: bool = True) -> dict:
+async def check_collect_service(verbose: bool = True, out: Optional[TextIO] = None) -> CheckResult:
     """检查采集服务连接"""
     if verbose:
-        print("\n" + "=" * 80)
-        print("采集服务连接检查")
-        print("=" * 80)
+        print("\n" + "=" * 80, file=out)
+        print("采集服务连接检查", file=out)
+        print("=" * 80, file=out)
     
     results = {"connected": False, "task_found": False}
     
     try:
-        import httpx
         base_url = os.getenv("COLLECT_SERVICE_URL", "http://localhost:3001")
         api_key = os.getenv("COLLECT_SERVICE_API_KEY", "")
         url = f"{base_url}/api/managed-tasks"
         if verbose:
-            print(f"检查: {url}")
-        
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                url,
-                params={"page": 1, "limit": 10},
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                },
-            )
+            print(f"检查: {url}", file=out)
+        
+        client = _get_http_client()
+        import httpx
+        # 先以 1s 超时探测 /health：服务未启动时直接失败，不必等任务列表请求超时。
+        # 探测只用来判断是否可达，有响应（即使非 2xx）或读超时都继续查询任务列表
+        try:
+            await client.get(f"{base_url}/health", timeout=1.0)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            raise
+        except httpx.HTTPError:
+            pass
+        
+        resp = await client.get(
+            url,
+            params={"page": 1, "limit": 10},
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            timeout=5.0,
+        )
         
         if resp.status_code == 200:
             results["connected"] = True
@@ -344,7 +460,7 @@ async def check_collect_service(verbose: bool = True) -> dict:
             tasks = data.get("data", {}).get("tasks", [])
             
             if verbose:
-                print(f"✓ 采集服务连接成功，共 {len(tasks)} 个任务")
+                print(f"✓ 采集服务连接成功，共 {len(tasks)} 个任务", file=out)
             
             # 查找"萌啦数据采集"任务
             for task in tasks:
@@ -352,24 +468,24 @@ async def check_collect_service(verbose: bool = True) -> dict:
                     results["task_found"] = True
                     results["task_id"] = task.get("id")
                     if verbose:
-                        print(f"✓ 找到'萌啦数据采集'任务 (ID: {task.get('id')})")
+                        print(f"✓ 找到'萌啦数据采集'任务 (ID: {task.get('id')})", file=out)
                     break
             
             if not results["task_found"] and verbose:
-                print("✗ 未找到'萌啦数据采集'任务")
-                print(f"  可用任务: {', '.join(t.get('name', '?') for t in tasks)}")
+                print("✗ 未找到'萌啦数据采集'任务", file=out)
+                print(f"  可用任务: {', '.join(t.get('name', '?') for t in tasks)}", file=out)
         else:
             if verbose:
-                print(f"✗ 采集服务响应异常: {resp.status_code}")
+                print(f"✗ 采集服务响应异常: {resp.status_code}", file=out)
                 
     except Exception as e:
         results["error"] = str(e)
         if verbose:
-            print(f"✗ 采集服务连接失败: {e}")
-            print("  提示: 检查网络、VPN 或采集服务配置")
+            print(f"✗ 采集服务连接失败: {e}", file=out)
+            print("  提示: 检查网络、VPN 或采集服务配置", file=out)
     
     results["_all_ok"] = results["connected"] and results["task_found"]
-    return results
+    return _to_result(results)
 
 
 # ==============================================================================
@@ -381,25 +497,57 @@ async def run_full_diagnose() -> dict:
     print("萌拉数据采集系统 - 完整诊断")
     print("=" * 80)
     
-    results = {}
-    
-    # 1. 环境变量
-    results["env"] = check_env_vars()
-    
-    # 2. Redis
-    results["redis"] = await check_redis()
-    
-    # 3. MongoDB
-    results["mongo"] = await check_mongo()
-    
-    # 4. FastAPI
-    results["fastapi"] = await check_fastapi()
+    from backend.infra import database
     
-    # 5. 采集服务
-    results["collect"] = await check_collect_service()
+    results = {}
     
-    # 6. 数据
-    results["data"] = await check_data()
+    try:
+        # 1. 环境变量
+        results["env"] = check_env_vars()
+        
+        # MongoDB / Redis 只连接一次，由各项检查共享；连接失败时把原始异常交给检查报告，不再重连
+        mongo_db = redis_client = None
+        mongo_error = redis_error = None
+        try:
+            await database.connect_to_mongo(
+                os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+                os.getenv("MONGO_DB", "industry_monitor"),
+            )
+            mongo_db = database.mongo_db
+        except Exception as e:
+            mongo_error = e
+        try:
+            await database.connect_to_redis(os.getenv("REDIS_URI", "redis://localhost:6379/0"))
+            redis_client = database.redis_client
+        except Exception as e:
+            redis_error = e
+        
+        # 2-5. Redis / MongoDB / FastAPI / 采集服务 互不依赖，并发检查；
+        # 各自输出先写入缓冲区，结束后按固定顺序打印，避免交错
+        service_checks = (
+            ("redis", functools.partial(check_redis, client=redis_client, connect_error=redis_error)),
+            ("mongo", functools.partial(check_mongo, db=mongo_db, connect_error=mongo_error)),
+            ("fastapi", check_fastapi),
+            ("collect", check_collect_service),
+        )
+        buffers = [io.StringIO() for _ in service_checks]
+        outcomes = await asyncio.gather(
+            *(check(out=buf) for (_, check), buf in zip(service_checks, buffers)),
+            return_exceptions=True,
+        )
+        for (name, _), buf, outcome in zip(service_checks, buffers, outcomes):
+            sys.stdout.write(buf.getvalue())
+            if isinstance(outcome, BaseException):
+                print(f"✗ {name} 检查异常: {outcome}")
+                outcome = CheckResult(all_ok=False, error=str(outcome))
+            results[name] = outcome
+        
+        # 6. 数据
+        results["data"] = await check_data(db=mongo_db, connect_error=mongo_error)
+    finally:
+        await _close_http_client()
+        await database.disconnect_mongo()
+        await database.disconnect_redis()
     
     # 总结
     print("\n" + "=" * 80)
@@ -407,12 +555,12 @@ async def run_full_diagnose() -> dict:
     print("=" * 80)
     
     checks = [
-        ("ENV", results["env"]["_all_ok"]),
-        ("REDIS", results["redis"]["_all_ok"]),
-        ("MONGO", results["mongo"]["_all_ok"]),
-        ("FASTAPI", results["fastapi"]["_all_ok"]),
-        ("COLLECT", results["collect"]["_all_ok"]),
-        ("DATA", results["data"]["_all_ok"]),
+        ("ENV", results["env"].all_ok),
+        ("REDIS", results["redis"].all_ok),
+        ("MONGO", results["mongo"].all_ok),
+        ("FASTAPI", results["fastapi"].all_ok),
+        ("COLLECT", results["collect"].all_ok),
+        ("DATA", results["data"].all_ok),
     ]
     
     all_ok = all(ok for _, ok in checks)
@@ -451,6 +599,8 @@ def main():
     )
     
     args = parser.parse_args()
+    # env 命令同样需要读取 .env 中的配置，因此所有命令都在分发前加载
+    _maybe_load_dotenv()
     
     if args.command == "env":
         check_env_vars()
@@ -458,10 +608,13 @@ def main():
         asyncio.run(check_data())
     elif args.command == "services":
         async def check_services():
-            await check_redis()
-            await check_mongo()
-            await check_fastapi()
-            await check_collect_service()
+            try:
+                await check_redis()
+                await check_mongo()
+                await check_fastapi()
+                await check_collect_service()
+            finally:
+                await _close_http_client()
         asyncio.run(check_services())
     else:
         asyncio.run(run_full_diagnose())
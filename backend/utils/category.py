@@ -1,42 +1,72 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import List, Optional, Set, Tuple
 
 _CATEGORIES_CACHE: Optional[List[dict]] = None
+# 已加载文件的 mtime（ns），供 reload_categories_if_changed 判断文件是否更新
+_CATEGORIES_MTIME: int = -1
 # category.json 在 backend/ 目录下
 _CATEGORIES_PATH = Path(__file__).resolve().parent.parent / "category.json"
 
 
+def _read_categories_file() -> Tuple[List[dict], int]:
+    """Read and parse category.json, returning (categories, mtime_ns)."""
+    if not _CATEGORIES_PATH.exists():
+        raise RuntimeError("categories file not found")
+    try:
+        mtime = _CATEGORIES_PATH.stat().st_mtime_ns
+        raw = _CATEGORIES_PATH.read_text(encoding="utf-8")
+        return json.loads(raw), mtime
+    except Exception as exc:  # noqa: BLE001
+        raise RuntimeError(f"failed to load categories: {exc}") from exc
+
+
 def _ensure_categories_loaded() -> List[dict]:
     """Lazy load categories JSON into memory."""
-    global _CATEGORIES_CACHE
+    global _CATEGORIES_CACHE, _CATEGORIES_MTIME
     if _CATEGORIES_CACHE is None:
-        if not _CATEGORIES_PATH.exists():
-            raise RuntimeError("categories file not found")
-        try:
-            raw = _CATEGORIES_PATH.read_text(encoding="utf-8")
-            _CATEGORIES_CACHE = json.loads(raw)
-        except Exception as exc:  # noqa: BLE001
-            raise RuntimeError(f"failed to load categories: {exc}") from exc
+        _CATEGORIES_CACHE, _CATEGORIES_MTIME = _read_categories_file()
     return _CATEGORIES_CACHE
 
 
+def reload_categories_if_changed() -> bool:
+    """
+    Re-read category.json when its mtime differs from the loaded copy and
+    drop memoized derived results. Returns True if a reload happened.
+    """
+    global _CATEGORIES_CACHE, _CATEGORIES_MTIME
+    try:
+        mtime = _CATEGORIES_PATH.stat().st_mtime_ns
+    except OSError:
+        return False
+    if _CATEGORIES_CACHE is not None and mtime == _CATEGORIES_MTIME:
+        return False
+    # 先完整读取再替换，读取失败时保留旧数据
+    _CATEGORIES_CACHE, _CATEGORIES_MTIME = _read_categories_file()
+    get_top_level_cat_ids.cache_clear()
+    return True
+
+
 def get_all_categories() -> List[dict]:
     """Return full category tree."""
     return _ensure_categories_loaded()
 
 
-def get_top_level_cat_ids() -> List[str]:
-    """Return all level-1 category IDs as strings (keep file order)."""
+@lru_cache(maxsize=1)
+def get_top_level_cat_ids() -> Tuple[str, ...]:
+    """
+    Return all level-1 category IDs as strings (keep file order).
+    Memoized until reload_categories_if_changed() picks up a new file;
+    returns a tuple so callers cannot mutate the shared result — wrap in
+    list() when a list is needed.
+    """
     categories = _ensure_categories_loaded()
-    ids: List[str] = []
-    for item in categories:
-        cid = item.get("catId")
-        if cid is not None:
-            ids.append(str(cid))
-    return ids
+    return tuple(
+        str(item["catId"]) for item in categories if item.get("catId") is not None
+    )
 
 
 def get_all_valid_cat_ids() -> Set[str]:
@@ -6,8 +6,10 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Dict, Any
-from datetime import timedelta
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping
+from datetime import datetime, timedelta, timezone
 
 _config_logger = logging.getLogger("mengla-config")
 
@@ -71,36 +73,57 @@ CRON_JOBS = {
 }
 
 
-def parse_cron_expr(cron_str: str) -> Dict[str, str]:
+@lru_cache(maxsize=128)
+def parse_cron_expr(cron_str: str) -> Mapping[str, str]:
     """
     解析标准 5 段 cron 表达式为 APScheduler 的 cron trigger 参数。
     格式: "minute hour day month day_of_week"
     返回: {"minute": ..., "hour": ..., "day": ..., "month": ..., "day_of_week": ...}
+
+    cron 字符串来自进程启动时固定的环境变量，结果可安全缓存；
+    返回只读映射，避免调用方修改共享的缓存值。
     """
-    parts = cron_str.strip().split()
-    if len(parts) != 5:
+    # 最多切 5 段；若第 5 段内仍含空白，说明字段多于 5 个
+    parts = cron_str.strip().split(None, 4)
+    if len(parts) != 5 or " " in parts[4] or "\t" in parts[4]:
         raise ValueError(f"Invalid cron expression (expected 5 fields): {cron_str}")
-    return {
+    return MappingProxyType({
         "minute": parts[0],
         "hour": parts[1],
         "day": parts[2],
         "month": parts[3],
         "day_of_week": parts[4],
-    }
+    })
+
+
+def _preparse_cron_jobs() -> Dict[str, Mapping[str, str]]:
+    parsed = {}
+    for job_id, job in CRON_JOBS.items():
+        try:
+            parsed[job_id] = parse_cron_expr(job["cron"])
+        except ValueError:
+            # 非法表达式不在导入时中断，由调度器注册时再次解析并报错
+            _config_logger.warning("Invalid cron for job %s: %r", job_id, job["cron"])
+    return parsed
+
+
+# 导入时预解析全部 CRON_JOBS，调度器注册任务时直接查表
+CRON_PARSED: Mapping[str, Mapping[str, str]] = MappingProxyType(_preparse_cron_jobs())
 
 
 # ==============================================================================
 # 缓存 TTL 配置（秒）
 # ==============================================================================
-CACHE_TTL: Dict[str, int] = {
+# 以下只读配置均用 MappingProxyType 冻结，可直接共享而无需防御性拷贝
+CACHE_TTL: Mapping[str, int] = MappingProxyType({
     "day": 4 * 3600,        # 4小时
     "month": 24 * 3600,     # 24小时
     "quarter": 7 * 86400,   # 7天
     "year": 30 * 86400,     # 30天
-}
+})
 
 # Redis 缓存 TTL（与上面保持一致，用于 Redis 操作）
-REDIS_TTL = CACHE_TTL.copy()
+REDIS_TTL = CACHE_TTL
 
 # L1 本地缓存配置
 L1_CACHE_CONFIG = {
@@ -112,12 +135,17 @@ L1_CACHE_CONFIG = {
 # ==============================================================================
 # MongoDB 数据保留策略（秒）
 # ==============================================================================
-DATA_RETENTION: Dict[str, int] = {
+DATA_RETENTION: Mapping[str, int] = MappingProxyType({
     "day": 30 * 86400,      # 30天
     "month": 90 * 86400,    # 90天
     "quarter": 365 * 86400, # 1年
     "year": 730 * 86400,    # 2年
-}
+})
+
+# 预先换算为 timedelta，get_expired_at 无需每次构造
+_RETENTION_DELTAS: Mapping[str, timedelta] = MappingProxyType({
+    g: timedelta(seconds=seconds) for g, seconds in DATA_RETENTION.items()
+})
 
 
 # ==============================================================================
@@ -163,38 +191,38 @@ CONCURRENT_CONFIG = {
 # ==============================================================================
 # 监控告警配置
 # ==============================================================================
-ALERTING_CONFIG = {
-    "rules": [
-        {
+ALERTING_CONFIG = MappingProxyType({
+    "rules": (
+        MappingProxyType({
             "name": "low_success_rate",
             "threshold": 0.95,  # 95%
             "level": "WARNING",
             "cooldown": 600,    # 10分钟
             "description": "采集成功率低于95%",
-        },
-        {
+        }),
+        MappingProxyType({
             "name": "critical_success_rate",
             "threshold": 0.80,  # 80%
             "level": "CRITICAL",
             "cooldown": 300,    # 5分钟
             "description": "采集成功率低于80%",
-        },
-        {
+        }),
+        MappingProxyType({
             "name": "high_latency",
             "threshold": 30.0,  # 30秒
             "level": "WARNING",
             "cooldown": 600,    # 10分钟
             "description": "平均采集延迟超过30秒",
-        },
-        {
+        }),
+        MappingProxyType({
             "name": "low_cache_hit_rate",
             "threshold": 0.50,  # 50%
             "level": "INFO",
             "cooldown": 1800,   # 30分钟
             "description": "缓存命中率低于50%",
-        },
-    ],
-}
+        }),
+    ),
+})
 
 
 # ==============================================================================
@@ -213,28 +241,38 @@ DB_CONFIG = {
 COLLECTION_NAME = "mengla_data"
 
 # Action 名称映射
-ACTION_MAPPING = {
+ACTION_MAPPING: Mapping[str, str] = MappingProxyType({
     "high": "high",
     "hot": "hot",
     "chance": "chance",
     "industryViewV2": "view",
     "industryTrendRange": "trend",
-}
+})
 
 
 # ==============================================================================
 # Redis Key 前缀
 # ==============================================================================
-REDIS_KEY_PREFIX = {
-    "data": "mengla:data",           # 数据缓存
-    "lock": "mengla:lock",           # 分布式锁
-    "task_queue": "mengla:task_queue",  # 任务队列
-    "stats": "mengla:stats",         # 采集统计
-    "circuit": "mengla:circuit",     # 熔断状态
-    "rate": "mengla:rate",           # 频控计数
-    "empty_streak": "mengla:empty_streak",  # 连续空数据计数
-    "exec": "mengla:exec",          # 执行结果（webhook 回调）
-}
+REDIS_PREFIX_DATA = "mengla:data"                  # 数据缓存
+REDIS_PREFIX_LOCK = "mengla:lock"                  # 分布式锁
+REDIS_PREFIX_TASK_QUEUE = "mengla:task_queue"      # 任务队列
+REDIS_PREFIX_STATS = "mengla:stats"                # 采集统计
+REDIS_PREFIX_CIRCUIT = "mengla:circuit"            # 熔断状态
+REDIS_PREFIX_RATE = "mengla:rate"                  # 频控计数
+REDIS_PREFIX_EMPTY_STREAK = "mengla:empty_streak"  # 连续空数据计数
+REDIS_PREFIX_EXEC = "mengla:exec"                  # 执行结果（webhook 回调）
+
+# 供遍历/自省使用；热路径直接引用上面的常量，省去一次字典查找
+REDIS_KEY_PREFIX: Mapping[str, str] = MappingProxyType({
+    "data": REDIS_PREFIX_DATA,
+    "lock": REDIS_PREFIX_LOCK,
+    "task_queue": REDIS_PREFIX_TASK_QUEUE,
+    "stats": REDIS_PREFIX_STATS,
+    "circuit": REDIS_PREFIX_CIRCUIT,
+    "rate": REDIS_PREFIX_RATE,
+    "empty_streak": REDIS_PREFIX_EMPTY_STREAK,
+    "exec": REDIS_PREFIX_EXEC,
+})
 
 
 # ==============================================================================
@@ -250,23 +288,25 @@ def get_retention_ttl(granularity: str) -> int:
     return DATA_RETENTION.get(granularity.lower(), DATA_RETENTION["day"])
 
 
-def get_expired_at(granularity: str) -> "datetime":
-    """计算指定颗粒度数据的过期时间"""
-    from datetime import datetime, timedelta
-    retention_seconds = get_retention_ttl(granularity)
-    return datetime.utcnow() + timedelta(seconds=retention_seconds)
+def get_expired_at(granularity: str) -> datetime:
+    """计算指定颗粒度数据的过期时间（UTC）"""
+    delta = _RETENTION_DELTAS.get(granularity.lower(), _RETENTION_DELTAS["day"])
+    return datetime.now(timezone.utc) + delta
+
+
+_DATA_PREFIX = REDIS_PREFIX_DATA + ":"
+_LOCK_PREFIX = REDIS_PREFIX_LOCK + ":"
 
 
+@lru_cache(maxsize=8192)
 def build_redis_data_key(action: str, cat_id: str, granularity: str, period_key: str) -> str:
-    """构建 Redis 数据缓存 key"""
-    prefix = REDIS_KEY_PREFIX["data"]
-    return f"{prefix}:{action}:{cat_id or 'all'}:{granularity}:{period_key}"
+    """构建 Redis 数据缓存 key（批量采集时同一组参数会反复构建，结果缓存）"""
+    return f"{_DATA_PREFIX}{action}:{cat_id or 'all'}:{granularity}:{period_key}"
 
 
 def build_redis_lock_key(action: str, cat_id: str, granularity: str, period_key: str) -> str:
     """构建 Redis 分布式锁 key"""
-    prefix = REDIS_KEY_PREFIX["lock"]
-    return f"{prefix}:{action}:{cat_id or 'all'}:{granularity}:{period_key}"
+    return f"{_LOCK_PREFIX}{action}:{cat_id or 'all'}:{granularity}:{period_key}"
 
 
 # ==============================================================================
@@ -286,12 +326,10 @@ def validate_env() -> None:
     若缺少必要变量则记录警告（不中断启动，兼容本地开发场景——
     本地 .env 或 docker-compose 会提供默认值）。
     """
-    import logging
-    _logger = logging.getLogger("mengla-config")
     recommended = ["MONGO_URI", "REDIS_URI"]
     missing = [k for k in recommended if not os.getenv(k)]
     if missing:
-        _logger.warning(
+        _config_logger.warning(
             "Recommended env vars not set (will use defaults): %s",
             ", ".join(missing),
         )
@@ -6,61 +6,105 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
 from pathlib import Path
-from typing import Any, Dict, List
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Tuple
+
+try:  # optional: faster JSON (de)serialization when installed
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 logger = logging.getLogger("mengla-backend")
 
-# Default module IDs matching frontend MODES + internal sections
-DEFAULT_MODULES: List[Dict[str, Any]] = [
-    {"id": "overview", "name": "行业总览", "enabled": True, "order": 0, "props": {}},
-    {"id": "high", "name": "蓝海Top行业", "enabled": True, "order": 1, "props": {}},
-    {"id": "hot", "name": "热销Top行业", "enabled": True, "order": 2, "props": {}},
-    {"id": "chance", "name": "潜力Top行业", "enabled": True, "order": 3, "props": {}},
-]
+# Default module IDs matching frontend MODES + internal sections.
+# Frozen so they can be shared safely; _default_modules() hands out mutable copies.
+DEFAULT_MODULES: Tuple[Mapping[str, Any], ...] = tuple(
+    MappingProxyType(m)
+    for m in (
+        {"id": "overview", "name": "行业总览", "enabled": True, "order": 0, "props": {}},
+        {"id": "high", "name": "蓝海Top行业", "enabled": True, "order": 1, "props": {}},
+        {"id": "hot", "name": "热销Top行业", "enabled": True, "order": 2, "props": {}},
+        {"id": "chance", "name": "潜力Top行业", "enabled": True, "order": 3, "props": {}},
+    )
+)
 
-DEFAULT_LAYOUT: Dict[str, Any] = {
+DEFAULT_LAYOUT: Mapping[str, Any] = MappingProxyType({
     "defaultPeriod": "month",
     "showRankPeriodSelector": True,
-}
+})
 
 # panel_config.json 在 backend/ 根目录下（与 category.json 同级）
 CONFIG_DIR = Path(__file__).resolve().parent.parent
 PANEL_CONFIG_PATH = CONFIG_DIR / "panel_config.json"
 
+# Parsed panel_config.json keyed by file mtime (ns); guarded by _panel_cache_lock
+_panel_cache: Dict[str, Any] = {"mtime": -1, "data": None}
+_panel_cache_lock = threading.Lock()
+
+
+def _default_modules() -> List[Dict[str, Any]]:
+    return [{**m, "props": dict(m["props"])} for m in DEFAULT_MODULES]
+
+
+def _default_config() -> Dict[str, Any]:
+    return {"modules": _default_modules(), "layout": dict(DEFAULT_LAYOUT)}
+
 
 def _load_raw() -> Dict[str, Any]:
-    if not PANEL_CONFIG_PATH.exists():
-        return {
-            "modules": list(DEFAULT_MODULES),
-            "layout": dict(DEFAULT_LAYOUT),
-        }
+    """
+    Return the panel config, re-reading the file only when its mtime changes.
+    Callers get a shallow copy, so replacing top-level keys never touches the cache.
+    """
+    try:
+        mtime = PANEL_CONFIG_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return _default_config()
+    except OSError as exc:
+        logger.warning("Failed to stat panel_config.json: %s, using defaults", exc)
+        return _default_config()
+    with _panel_cache_lock:
+        if _panel_cache["mtime"] == mtime and _panel_cache["data"] is not None:
+            return dict(_panel_cache["data"])
+    data = _read_file()
+    with _panel_cache_lock:
+        _panel_cache["mtime"] = mtime
+        _panel_cache["data"] = data
+    return dict(data)
+
+
+def _read_file() -> Dict[str, Any]:
     try:
-        raw = PANEL_CONFIG_PATH.read_text(encoding="utf-8")
-        data = json.loads(raw)
+        raw = PANEL_CONFIG_PATH.read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         if not isinstance(data, dict):
-            return {"modules": list(DEFAULT_MODULES), "layout": dict(DEFAULT_LAYOUT)}
+            return _default_config()
         modules = data.get("modules")
         if not isinstance(modules, list):
-            data["modules"] = list(DEFAULT_MODULES)
+            data["modules"] = _default_modules()
         layout = data.get("layout")
         if not isinstance(layout, dict):
             data["layout"] = dict(DEFAULT_LAYOUT)
         return data
     except Exception as exc:  # noqa: BLE001
         logger.warning("Failed to load panel_config.json: %s, using defaults", exc)
-        return {
-            "modules": list(DEFAULT_MODULES),
-            "layout": dict(DEFAULT_LAYOUT),
-        }
+        return _default_config()
 
 
 def _save_raw(data: Dict[str, Any]) -> None:
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    PANEL_CONFIG_PATH.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    if orjson is not None:
+        PANEL_CONFIG_PATH.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        PANEL_CONFIG_PATH.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+    # mtime 精度不足时同一时刻的两次写入可能不变，显式失效确保下次重新读取
+    with _panel_cache_lock:
+        _panel_cache["mtime"] = -1
+        _panel_cache["data"] = None
 
 
 def get_panel_config() -> Dict[str, Any]:
@@ -1,9 +1,87 @@
 from __future__ import annotations
 
-import calendar
+import logging
 import re
-from datetime import datetime
-from typing import Dict
+from datetime import date, datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional
+
+_logger = logging.getLogger("mengla-backend")
+
+_RE_YMD = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_RE_YM = re.compile(r"^\d{4}-\d{2}$")
+_RE_QTR = re.compile(r"^(\d{4})-?[Qq](\d)$")
+
+# 颗粒度 -> 趋势接口（industryTrendRange）的 dateType 参数
+TREND_DATE_TYPES: Mapping[str, str] = MappingProxyType({
+    "day": "DAY",
+    "month": "MONTH",
+    "quarter": "QUARTERLY_FOR_YEAR",
+    "year": "YEAR",
+})
+
+
+def _parse_day(raw: str) -> Optional[datetime]:
+    # YYYYMMDD (8 digits) or yyyy-MM-dd
+    if len(raw) == 8 and raw.isdigit():
+        return datetime.strptime(raw, "%Y%m%d")
+    if _RE_YMD.match(raw):
+        return datetime.strptime(raw, "%Y-%m-%d")
+    return None
+
+
+def _parse_month(raw: str) -> Optional[datetime]:
+    # YYYYMM (6 digits) or yyyy-MM
+    if len(raw) == 6 and raw.isdigit():
+        return datetime.strptime(raw, "%Y%m")
+    if _RE_YM.match(raw):
+        return datetime.strptime(raw + "-01", "%Y-%m-%d")
+    return None
+
+
+def _parse_quarter(raw: str) -> Optional[datetime]:
+    # YYYYQn or yyyy-Qn
+    m = _RE_QTR.match(raw)
+    if m:
+        y, q = int(m.group(1)), int(m.group(2))
+        return datetime(y, (q - 1) * 3 + 1, 1)
+    return None
+
+
+def _parse_year(raw: str) -> Optional[datetime]:
+    # YYYY (4 digits)
+    if len(raw) == 4 and raw.isdigit():
+        return datetime(int(raw), 1, 1)
+    return None
+
+
+# 按颗粒度分派的 timest 解析器；无法识别时返回 None，由调用方走兜底逻辑
+_PARSERS: Dict[str, Callable[[str], Optional[datetime]]] = {
+    "day": _parse_day,
+    "month": _parse_month,
+    "quarter": _parse_quarter,
+    "year": _parse_year,
+}
+
+
+@lru_cache(maxsize=4096)
+def _parse_timest_cached(g: str, raw: str) -> Optional[datetime]:
+    """
+    非空 timest 的纯解析部分，结果只取决于参数，可安全缓存（datetime 不可变）。
+    回填时同一批 (granularity, timest) 会被反复解析，缓存后只解析一次。
+    无法识别时返回 None；空值与无法识别时回退 utcnow() 的逻辑不缓存。
+    """
+    parser = _PARSERS.get(g)
+    if parser is not None:
+        dt = parser(raw)
+        if dt is not None:
+            return dt
+
+    # fallback: try YYYYMMDD
+    if len(raw) == 8 and raw.isdigit():
+        return datetime.strptime(raw, "%Y%m%d")
+    return None
 
 
 def parse_timest_to_datetime(granularity: str, timest: str) -> datetime:
@@ -15,50 +93,13 @@ def parse_timest_to_datetime(granularity: str, timest: str) -> datetime:
     当 timest 为空时返回 utcnow()（向后兼容）。
     当 timest 非空但格式无法识别时记录警告并返回 utcnow()（避免静默掩盖错误）。
     """
-    import logging
-    _logger = logging.getLogger("mengla-backend")
-
     raw = (timest or "").strip()
     if not raw:
         return datetime.utcnow()
 
-    g = (granularity or "day").lower()
-
-    # day: YYYYMMDD (8 digits) or yyyy-MM-dd
-    if g == "day":
-        if len(raw) == 8 and raw.isdigit():
-            return datetime.strptime(raw, "%Y%m%d")
-        if re.match(r"^\d{4}-\d{2}-\d{2}$", raw):
-            return datetime.strptime(raw, "%Y-%m-%d")
-
-    # month: YYYYMM (6 digits) or yyyy-MM
-    if g == "month":
-        if len(raw) == 6 and raw.isdigit():
-            return datetime.strptime(raw, "%Y%m")
-        if re.match(r"^\d{4}-\d{2}$", raw):
-            return datetime.strptime(raw + "-01", "%Y-%m-%d")
-
-    # quarter: YYYYQn or yyyy-Qn
-    if g == "quarter":
-        m = re.match(r"^(\d{4})[Qq](\d)$", raw)
-        if m:
-            y, q = int(m.group(1)), int(m.group(2))
-            month = (q - 1) * 3 + 1
-            return datetime(y, month, 1)
-        m = re.match(r"^(\d{4})-Q(\d)$", raw, re.IGNORECASE)
-        if m:
-            y, q = int(m.group(1)), int(m.group(2))
-            month = (q - 1) * 3 + 1
-            return datetime(y, month, 1)
-
-    # year: YYYY (4 digits)
-    if g == "year":
-        if len(raw) == 4 and raw.isdigit():
-            return datetime(int(raw), 1, 1)
-
-    # fallback: try YYYYMMDD
-    if len(raw) == 8 and raw.isdigit():
-        return datetime.strptime(raw, "%Y%m%d")
+    dt = _parse_timest_cached((granularity or "day").lower(), raw)
+    if dt is not None:
+        return dt
 
     # 无法识别的格式 — 记录警告而非静默回退
     _logger.warning(
@@ -76,13 +117,33 @@ def make_period_keys(dt: datetime) -> Dict[str, str]:
   - quarter: YYYYQn
   - year: YYYY
   """
+  return dict(zip(_PERIOD_KEY_NAMES, _period_keys_cached(dt)))
+
+
+_PERIOD_KEY_NAMES = ("day", "month", "quarter", "year")
+
+
+@lru_cache(maxsize=4096)
+def _period_keys_cached(dt: datetime) -> tuple[str, str, str, str]:
+  # 返回不可变 tuple 以便缓存共享，make_period_keys 每次再组装新 dict
   quarter = (dt.month - 1) // 3 + 1
-  return {
-      "day": dt.strftime("%Y%m%d"),
-      "month": dt.strftime("%Y%m"),
-      "quarter": f"{dt.year}Q{quarter}",
-      "year": dt.strftime("%Y"),
-  }
+  return (
+      dt.strftime("%Y%m%d"),
+      dt.strftime("%Y%m"),
+      f"{dt.year}Q{quarter}",
+      dt.strftime("%Y"),
+  )
+
+
+# 前端已经保证只会传 day / month / quarter / year / others（大小写不限）；
+# “其他” 粒度按日来统计
+_GRAN_MAP = {
+  "day": "day",
+  "month": "month",
+  "quarter": "quarter",
+  "year": "year",
+  "others": "day",
+}
 
 
 def normalize_granularity(date_type: str | None) -> str:
@@ -93,18 +154,8 @@ def normalize_granularity(date_type: str | None) -> str:
   # quarter / quarterly_for_year / QUARTER 等统一映射为 quarter 粒度
   if key.startswith("quarter"):
       return "quarter"
-  # 前端已经保证只会传 day / month / quarter / year / others（大小写不限）
-  if key in ("day",):
-      return "day"
-  if key in ("month",):
-      return "month"
-  if key in ("year",):
-      return "year"
-  if key in ("others",):
-      # “其他” 粒度按日来统计
-      return "day"
   # 兜底：认为是按日
-  return "day"
+  return _GRAN_MAP.get(key, "day")
 
 
 def to_collect_api_date(granularity: str, timest: str) -> tuple[str, str]:
@@ -117,7 +168,7 @@ def to_collect_api_date(granularity: str, timest: str) -> tuple[str, str]:
     raw = (timest or "").strip()
     if len(raw) == 8 and raw.isdigit():
       return ("day", raw)
-    if re.match(r"^\d{4}-\d{2}-\d{2}$", raw):
+    if _RE_YMD.match(raw):
       return ("day", raw.replace("-", ""))
     # 其他 day 格式兜底
     dt = parse_timest_to_datetime("day", timest)
@@ -131,7 +182,7 @@ def to_dashed_date(value: str) -> str:
   将 YYYYMMDD 或 yyyy-MM-dd 转为 yyyy-MM-dd，采集 API 要求日期带连字符。
   """
   raw = (value or "").strip()
-  if re.match(r"^\d{4}-\d{2}-\d{2}$", raw):
+  if _RE_YMD.match(raw):
     return raw
   if len(raw) == 8 and raw.isdigit():
     return f"{raw[0:4]}-{raw[4:6]}-{raw[6:8]}"
@@ -178,26 +229,40 @@ def format_trend_range_for_api(
     if g == "day":
       return to_dashed_date(raw)
     if g == "month":
-      if re.match(r"^\d{4}-\d{2}-\d{2}$", raw):
+      if _RE_YMD.match(raw):
         return raw[:7]
       return format_for_collect_api("month", raw)
     if g == "quarter":
-      if re.match(r"^\d{4}-\d{2}-\d{2}$", raw):
+      if _RE_YMD.match(raw):
         dt = parse_timest_to_datetime("day", raw)
         q = (dt.month - 1) // 3 + 1
         return f"{dt.year}-Q{q}"
       return format_for_collect_api("quarter", raw)
     if g == "year":
-      if re.match(r"^\d{4}-\d{2}-\d{2}$", raw) or (
+      if _RE_YMD.match(raw) or (
         len(raw) >= 4 and raw[:4].isdigit()
       ):
         return raw[:4]
       return format_for_collect_api("year", raw)
     return to_dashed_date(raw)
 
+  # 单周期查询（起止相同）只需归一化一次
+  if raw_start == raw_end:
+    v = normalize(raw_start)
+    return (v, v)
   return (normalize(raw_start), normalize(raw_end))
 
 
+_MONTH_LAST = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _last_day(year: int, month: int) -> int:
+  """当月最后一天（替代 calendar.monthrange，只需天数）"""
+  if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+    return 29
+  return _MONTH_LAST[month]
+
+
 def period_to_date_range(granularity: str, timest: str) -> tuple[str, str]:
   """
   根据粒度与 timest 计算该周期的真实起止日期（yyyy-MM-dd），
@@ -214,7 +279,7 @@ def period_to_date_range(granularity: str, timest: str) -> tuple[str, str]:
     return (s, s)
   if g == "month":
     start = dt.replace(day=1)
-    _, last_day = calendar.monthrange(dt.year, dt.month)
+    last_day = _last_day(dt.year, dt.month)
     end = dt.replace(day=last_day)
     return (start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
   if g == "quarter":
@@ -222,7 +287,7 @@ def period_to_date_range(granularity: str, timest: str) -> tuple[str, str]:
     start_month = (q - 1) * 3 + 1
     start = dt.replace(month=start_month, day=1)
     end_month = start_month + 2
-    _, last_day = calendar.monthrange(dt.year, end_month)
+    last_day = _last_day(dt.year, end_month)
     end = dt.replace(month=end_month, day=last_day)
     return (start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
   if g == "year":
@@ -235,8 +300,9 @@ def period_to_date_range(granularity: str, timest: str) -> tuple[str, str]:
 
 def timest_to_period_key(granularity: str, timest: str) -> str:
   """将单个时间点 timest（如 20250115 或 2025-01-15）转为该粒度下的 period_key。"""
-  dt = parse_timest_to_datetime((granularity or "day").lower(), timest or "")
-  return make_period_keys(dt).get((granularity or "day").lower(), make_period_keys(dt)["day"])
+  g = (granularity or "day").lower()
+  keys = make_period_keys(parse_timest_to_datetime(g, timest or ""))
+  return keys.get(g, keys["day"])
 
 
 def period_keys_in_range(granularity: str, start_date: str, end_date: str) -> list[str]:
@@ -247,18 +313,15 @@ def period_keys_in_range(granularity: str, start_date: str, end_date: str) -> li
   - quarter: 同区间 -> [2025Q1]
   - year: 同区间 -> [2025]
   """
-  from datetime import timedelta
-
   g = (granularity or "day").lower()
   # 解析为日期
   def parse_d(s: str) -> datetime:
-    import logging
     raw = (s or "").strip()[:10]
-    if re.match(r"^\d{4}-\d{2}-\d{2}$", raw):
+    if _RE_YMD.match(raw):
       return datetime.strptime(raw, "%Y-%m-%d")
     if len(raw) == 8 and raw.isdigit():
       return datetime.strptime(raw, "%Y%m%d")
-    logging.getLogger("mengla-backend").warning(
+    _logger.warning(
       "period_keys_in_range.parse_d: 无法识别的日期格式 %r，回退到 utcnow()", s,
     )
     return datetime.utcnow()
@@ -268,43 +331,38 @@ def period_keys_in_range(granularity: str, start_date: str, end_date: str) -> li
   if start_d > end_d:
     start_d, end_d = end_d, start_d
 
-  keys: list[str] = []
+  # 各分支先算出 key 数量并预分配列表，再按下标填充，避免逐个 append 扩容
   if g == "day":
-    d = start_d
-    while d <= end_d:
-      keys.append(d.strftime("%Y%m%d"))
-      d += timedelta(days=1)
-    return keys
+    return _day_keys(start_d, end_d)
   if g == "month":
-    y, m = start_d.year, start_d.month
-    ey, em = end_d.year, end_d.month
-    while (y, m) <= (ey, em):
-      keys.append(datetime(y, m, 1).strftime("%Y%m"))
-      if m == 12:
-        y, m = y + 1, 1
-      else:
-        m += 1
+    first = start_d.year * 12 + start_d.month - 1
+    n = end_d.year * 12 + end_d.month - 1 - first + 1
+    keys = [""] * n
+    for i in range(n):
+      y, m0 = divmod(first + i, 12)
+      keys[i] = f"{y:04d}{m0 + 1:02d}"
     return keys
   if g == "quarter":
-    y, q = start_d.year, (start_d.month - 1) // 3 + 1
-    ey, eq = end_d.year, (end_d.month - 1) // 3 + 1
-    while (y, q) <= (ey, eq):
-      keys.append(f"{y}Q{q}")
-      if q == 4:
-        y, q = y + 1, 1
-      else:
-        q += 1
+    first = start_d.year * 4 + (start_d.month - 1) // 3
+    n = end_d.year * 4 + (end_d.month - 1) // 3 - first + 1
+    keys = [""] * n
+    for i in range(n):
+      y, q0 = divmod(first + i, 4)
+      keys[i] = f"{y}Q{q0 + 1}"
     return keys
   if g == "year":
-    y = start_d.year
-    while y <= end_d.year:
-      keys.append(str(y))
-      y += 1
-    return keys
+    return [str(y) for y in range(start_d.year, end_d.year + 1)]
   # 默认按天
-  d = start_d
-  while d <= end_d:
-    keys.append(d.strftime("%Y%m%d"))
-    d += timedelta(days=1)
+  return _day_keys(start_d, end_d)
+
+
+def _day_keys(start_d: datetime, end_d: datetime) -> list[str]:
+  """按序数逐日生成 YYYYMMDD，避免每天一次 strftime 格式串解析"""
+  base = start_d.toordinal()
+  n = end_d.toordinal() - base + 1
+  keys = [""] * n
+  fromordinal = date.fromordinal
+  for i in range(n):
+    d = fromordinal(base + i)
+    keys[i] = f"{d.year:04d}{d.month:02d}{d.day:02d}"
   return keys
-
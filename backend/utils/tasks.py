@@ -2,40 +2,157 @@
 
 从 main.py 抽离，避免其他模块（如 panel_routes）反向导入 main 造成循环依赖。
 
-注意：asyncio 是单线程协作式调度，set 的 add/discard 操作不会被中途打断，
-因此 _track_task（同步函数）中的 add 和 done_callback 中的 discard 是安全的。
-Lock 仅用于保护 cancel_all_tracked_tasks 中的快照 + 批量取消流程。
+跟踪结构是带哨兵的双向循环链表：登记/移除都是 O(1) 指针操作，无需对 Task 做哈希。
+链表节点持有 Task 的强引用（事件循环只弱引用任务），防止运行中的后台任务被 GC 回收。
+
+每个事件循环各有一条链表（_registries 以 loop 为弱引用键），测试或调度器线程里
+另起的事件循环不会和主循环共用同一份结构，循环被回收后对应条目自动消失。
+
+注意：asyncio 是单线程协作式调度，链表的插入/摘除不会被中途打断，
+因此 _track_task（同步函数）中的插入和 done_callback 中的摘除是安全的；
+tracked_tasks() 的遍历中间没有 await，快照同样是原子的，不需要额外加锁。
+只有新建/枚举注册表这种低频操作跨线程，用 _registries_lock 保护。
 """
 import asyncio
+import concurrent.futures
+import threading
+import weakref
+from typing import List, Optional
+
+
+class _TaskNode:
+    """链表节点；哨兵节点的 task 为 None，已摘除节点的 prev/next 为 None"""
+    __slots__ = ("next", "prev", "task")
+
+    def __init__(self, task: Optional[asyncio.Task] = None) -> None:
+        self.task = task
+        self.prev: Optional[_TaskNode] = self
+        self.next: Optional[_TaskNode] = self
+
+
+class _TaskList:
+    """单个事件循环的任务链表，只在所属循环的线程内修改"""
+    __slots__ = ("count", "head")
+
+    def __init__(self) -> None:
+        self.head = _TaskNode()
+        self.count = 0
+
+    def link(self, node: _TaskNode) -> None:
+        head = self.head
+        node.prev = head
+        node.next = head.next
+        head.next.prev = node
+        head.next = node
+        self.count += 1
+
+    def unlink(self, node: _TaskNode) -> None:
+        if node.prev is None:  # 已摘除
+            return
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        node.prev = node.next = None
+        self.count -= 1
+
+    def snapshot(self) -> List[asyncio.Task]:
+        # 长度已知，预分配后按下标填充，避免 append 过程中的扩容
+        tasks = [None] * self.count
+        node = self.head.next
+        for i in range(self.count):
+            tasks[i] = node.task
+            node = node.next
+        return tasks
+
 
-_bg_lock = asyncio.Lock()
-_background_tasks: set[asyncio.Task] = set()
+# 以 loop 为弱引用键（uvloop 的 Loop 不支持挂任意属性），不延长循环的生命周期
+_registries: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _TaskList]" = (
+    weakref.WeakKeyDictionary()
+)
+_registries_lock = threading.Lock()
+
+
+def _registry(loop: Optional[asyncio.AbstractEventLoop] = None) -> _TaskList:
+    """返回指定（默认当前）事件循环的任务链表，不存在则创建。"""
+    loop = loop or asyncio.get_running_loop()
+    reg = _registries.get(loop)
+    if reg is None:
+        with _registries_lock:
+            reg = _registries.setdefault(loop, _TaskList())
+    return reg
+
+
+def _cancel_registry(reg: _TaskList, result: concurrent.futures.Future) -> None:
+    """在所属循环线程内取消该链表中的全部任务，把实际取消的数量写回 result。"""
+    cancelled = 0
+    for task in reg.snapshot():
+        if task.cancel():
+            cancelled += 1
+    result.set_result(cancelled)
+
+
+def tracked_tasks() -> List[asyncio.Task]:
+    """返回当前事件循环跟踪的后台任务快照。"""
+    reg = _registries.get(asyncio.get_running_loop())
+    return reg.snapshot() if reg is not None else []
 
 
 def _track_task(coro) -> asyncio.Task:
     """创建后台任务并跟踪，任务完成后自动移除引用。"""
-    task = asyncio.create_task(coro)
-    _background_tasks.add(task)
-    task.add_done_callback(_background_tasks.discard)
+    # 只取一次运行中的 loop，直接 loop.create_task，省去 asyncio.create_task 内部的再次查找
+    loop = asyncio.get_running_loop()
+    task = loop.create_task(coro)
+    if task.done():
+        # eager_task_factory 下同步跑完的任务无需登记，也不必挂 done_callback
+        return task
+    reg = _registry(loop)
+    node = _TaskNode(task)
+    reg.link(node)
+    task.add_done_callback(lambda _t, r=reg, n=node: r.unlink(n))
     return task
 
 
 async def cancel_all_tracked_tasks(timeout: float = 5.0) -> int:
-    """取消所有跟踪的后台任务，返回已取消数量。"""
-    async with _bg_lock:
-        tasks_snapshot = list(_background_tasks)
-    if not tasks_snapshot:
+    """取消所有事件循环中跟踪的后台任务，返回已取消数量。
+
+    当前循环的任务直接取消并等待结束；其他循环的任务通过
+    call_soon_threadsafe 投递到各自线程取消，由投递的回调回报实际取消数量，
+    只等待回报、不等待这些任务结束。超时前未回报的循环不计入返回值。
+    """
+    # 快速路径：没有任何任务时直接返回
+    if not get_tracked_tasks_count():
         return 0
-    cancelled = 0
-    for task in tasks_snapshot:
-        if not task.done():
-            task.cancel()
-            cancelled += 1
-    if tasks_snapshot:
-        await asyncio.wait(tasks_snapshot, timeout=timeout)
+    current = asyncio.get_running_loop()
+    with _registries_lock:
+        foreign = [(lp, reg) for lp, reg in _registries.items() if lp is not current]
+    reports = []
+    for lp, reg in foreign:
+        if not reg.count:
+            continue
+        result: concurrent.futures.Future = concurrent.futures.Future()
+        try:
+            lp.call_soon_threadsafe(_cancel_registry, reg, result)
+        except RuntimeError:  # 循环已关闭
+            continue
+        reports.append(asyncio.wrap_future(result))
+
+    tasks_snapshot = tracked_tasks()
+    # Task.cancel() 对已完成任务返回 False，单次遍历即可完成取消与计数
+    cancelled = sum(task.cancel() for task in tasks_snapshot)
+    # gather 只注册一个聚合回调；asyncio.timeout 只挂一个定时器，
+    # 不像 wait_for 那样额外包一层任务
+    try:
+        async with asyncio.timeout(timeout):
+            if reports:
+                cancelled += sum(await asyncio.gather(*reports))
+            if tasks_snapshot:
+                await asyncio.gather(*tasks_snapshot, return_exceptions=True)
+    except TimeoutError:
+        pass
     return cancelled
 
 
 def get_tracked_tasks_count() -> int:
-    """获取当前跟踪的后台任务数量。"""
-    return len(_background_tasks)
+    """获取所有事件循环跟踪的后台任务总数（各循环计数器求和）。"""
+    with _registries_lock:
+        regs = list(_registries.values())
+    return sum(reg.count for reg in regs)